@@ -7,19 +7,47 @@ response-shaping logic.
 
 from __future__ import annotations
 
-import json
+import asyncio
+import atexit
+import copy
+import hashlib
+import logging
+import operator
 import os
+import random
+import re
+import threading
 import time
-from functools import lru_cache
-from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
 
+import aiohttp
+import orjson
 from dotenv import load_dotenv
 from azure.core.credentials import AzureKeyCredential
-from azure.search.documents.knowledgebases import KnowledgeBaseRetrievalClient
+from azure.core.exceptions import HttpResponseError
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.search.documents.knowledgebases.aio import (
+    KnowledgeBaseRetrievalClient as AsyncKBClient,
+)
 from azure.search.documents.knowledgebases.models import (
     KnowledgeBaseMessage,
     KnowledgeBaseMessageTextContent,
     KnowledgeBaseRetrievalRequest,
+    KnowledgeBaseRetrievalResponse,
     KnowledgeRetrievalLowReasoningEffort,
     KnowledgeRetrievalMediumReasoningEffort,
     KnowledgeRetrievalMinimalReasoningEffort,
@@ -27,13 +55,50 @@ from azure.search.documents.knowledgebases.models import (
     SearchIndexKnowledgeSourceParams,
 )
 
+from semantic_cache import QueryEmbedder, SemanticCache, semantic_cache_enabled
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
 
 class KBConfigurationError(RuntimeError):
     """Raised when mandatory configuration is missing."""
 
 
+class _TTLCache:
+    """Small LRU cache whose entries expire ``ttl`` seconds after insertion."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Any) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Any, value: Any) -> None:
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
 @lru_cache(maxsize=1)
 def _load_settings() -> Dict[str, Any]:
     search_url = os.getenv("search_url")
@@ -54,30 +119,260 @@ def _load_settings() -> Dict[str, Any]:
     }
 
 
-@lru_cache(maxsize=1)
-def _get_kb_client() -> KnowledgeBaseRetrievalClient:
-    settings = _load_settings()
-    return KnowledgeBaseRetrievalClient(
-        endpoint=settings["search_url"],
-        knowledge_base_name=settings["knowledge_base_name"],
-        credential=AzureKeyCredential(settings["api_key"]),
+_MAX_CONCURRENCY = int(os.getenv("KB_MAX_CONCURRENCY", "8"))
+_QUERY_TIMEOUT_SECONDS = float(os.getenv("KB_QUERY_TIMEOUT_SECONDS", "60"))
+# Per-index requests kept in flight across all concurrent fan-out queries, so
+# bursts from many users stay within the search service's throttling limits.
+# 0 (the default) allows one request per index, so a lone query still costs a
+# single round.
+_FAN_OUT_CONCURRENCY = int(os.getenv("KB_FAN_OUT_CONCURRENCY", "0"))
+
+# The SDK's own status retries are disabled on the client (retry_status=0), so
+# this covers what azure-core would retry: transient server errors, throttling,
+# and any response carrying Retry-After (see _retrieve_with_backoff).
+_RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+# Longest citation text sent to web clients; the citation modal only shows an
+# excerpt, and full chunks can run to many kilobytes each.
+_CITATION_MAX_CHARS = int(os.getenv("KB_CITATION_MAX_CHARS", "1200"))
+
+# Deep reasoning is never served from cache so its answers stay fresh.
+_UNCACHED_REASONING = frozenset({"medium"})
+_RESULT_CACHE = _TTLCache(
+    maxsize=512,
+    ttl=float(os.getenv("KB_RESULT_CACHE_TTL", "300")),
+)
+
+# Second cache tier for paraphrased questions, enabled by KB_SEMANTIC_CACHE=1.
+# One index per override combination so answers for different reasoning or
+# output settings never stand in for each other.
+_SEMANTIC_CACHE_TTL = float(os.getenv("KB_SEMANTIC_CACHE_TTL", str(7 * 24 * 3600)))
+_SEMANTIC_CACHE_DIR = Path(
+    os.getenv("KB_SEMANTIC_CACHE_DIR", str(Path.home() / ".kb_cache" / "semantic"))
+).expanduser()
+_semantic_caches: Dict[Tuple[Any, ...], SemanticCache] = {}
+
+# Curated questions answered at startup when KB_WARM_CACHE=1.
+_WARM_QUERIES_PATH = Path(__file__).resolve().parent / "warm_queries.json"
+
+# Cache misses currently being retrieved, keyed like _RESULT_CACHE.
+_inflight: Dict[Tuple[Any, ...], "asyncio.Future[Dict[str, Any]]"] = {}
+
+# Upper bound on concurrent KB connections. A larger pool allows more
+# overlapping round-trips (e.g. from execute_kb_query_batch) at the cost of
+# more sockets and memory; keep it at or above KB_MAX_CONCURRENCY.
+_HTTP_POOL_SIZE = int(os.getenv("KB_HTTP_POOL_SIZE", "32"))
+_HTTP_KEEPALIVE_SECONDS = 75
+
+_kb_client: Optional[AsyncKBClient] = None
+_kb_client_loop: Optional[asyncio.AbstractEventLoop] = None
+# Bound to the same loop as the client and rebuilt with it.
+_fan_out_semaphore: Optional[asyncio.Semaphore] = None
+_kb_session: Optional[aiohttp.ClientSession] = None
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+# The private loop may be driven from a keep-alive thread as well as the caller.
+_sync_loop_lock = threading.Lock()
+
+
+def _build_transport() -> AioHttpTransport:
+    """Create a pooled keep-alive transport so repeat queries skip TCP+TLS setup."""
+
+    global _kb_session
+    connector = aiohttp.TCPConnector(
+        limit=_HTTP_POOL_SIZE,
+        limit_per_host=_HTTP_POOL_SIZE,
+        keepalive_timeout=_HTTP_KEEPALIVE_SECONDS,
     )
+    session = aiohttp.ClientSession(
+        connector=connector,
+        headers={"Connection": "keep-alive"},
+    )
+    _kb_session = session
+    return AioHttpTransport(session=session, session_owner=True)
 
 
-_REASONING_FACTORIES: Dict[str, Any] = {
-    "minimal": KnowledgeRetrievalMinimalReasoningEffort,
-    "low": KnowledgeRetrievalLowReasoningEffort,
-    "medium": KnowledgeRetrievalMediumReasoningEffort,
-}
+async def _get_kb_client() -> AsyncKBClient:
+    """Return the shared async client, creating it on the running loop.
+
+    The aio transport is bound to the event loop it was created on, so the
+    singleton is rebuilt if it is requested from a different loop. There is no
+    ``await`` between the check and the assignment, which keeps this atomic.
+    """
+
+    global _kb_client, _kb_client_loop, _fan_out_semaphore
+    loop = asyncio.get_running_loop()
+    if _kb_client is None or _kb_client_loop is not loop:
+        settings = _load_settings()
+        _kb_client = AsyncKBClient(
+            endpoint=settings["search_url"],
+            knowledge_base_name=settings["knowledge_base_name"],
+            credential=AzureKeyCredential(settings["api_key"]),
+            transport=_build_transport(),
+            # Status retries are handled (and counted) by _retrieve_with_backoff.
+            retry_status=0,
+        )
+        _fan_out_semaphore = asyncio.Semaphore(
+            _FAN_OUT_CONCURRENCY or len(_fan_out_params())
+        )
+        _kb_client_loop = loop
+    return _kb_client
+
 
-_REASONING_CANONICAL: Dict[str, str] = {key: key for key in _REASONING_FACTORIES}
+async def get_kb_client() -> AsyncKBClient:
+    """Return the shared KnowledgeBaseRetrievalClient for the running event loop.
+
+    Applications can call this at startup so the client and its connection
+    pool exist before the first query arrives.
+    """
+
+    return await _get_kb_client()
+
+
+async def close_kb_client() -> None:
+    """Close the shared async client (call from application shutdown hooks)."""
+
+    global _kb_client, _kb_client_loop, _kb_session, _fan_out_semaphore
+    client, _kb_client, _kb_client_loop, _kb_session = _kb_client, None, None, None
+    _fan_out_semaphore = None
+    if client is not None:
+        await client.close()
+
+
+async def warm_kb_connection() -> None:
+    """Issue a cheap request over the pooled session to keep it from idling out.
+
+    Azure endpoints tear down idle TCP/TLS sessions, so the first question after
+    a pause pays a fresh handshake. Any response, even an error status, keeps
+    the pooled connection warm.
+    """
+
+    await _get_kb_client()
+    if _kb_session is None:
+        return
+    async with _kb_session.head(_load_settings()["search_url"]):
+        pass
+
+
+def warm_kb_connection_sync() -> None:
+    """Blocking wrapper around :func:`warm_kb_connection` for the console app."""
+
+    _run_sync(warm_kb_connection())
+
+
+async def warm_query_path(query_mode: str = "per-source") -> None:
+    """Set up ahead of time what the first query would otherwise build inline.
+
+    Opens the pooled search connection and, when the semantic cache is enabled,
+    creates the embedding client and loads the default cache tier from disk.
+    """
+
+    query_mode = _normalize_query_mode(query_mode)
+    await warm_kb_connection()
+    if _query_embedder() is not None:
+        _semantic_cache_for((None, None, query_mode))
+
+
+def warm_query_path_sync(query_mode: str = "per-source") -> None:
+    """Blocking wrapper around :func:`warm_query_path` for the console app."""
+
+    _run_sync(warm_query_path(query_mode))
+
+
+def _retry_after_seconds(exc: HttpResponseError) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+async def _retrieve_with_backoff(
+    client: AsyncKBClient,
+    request: KnowledgeBaseRetrievalRequest,
+    max_attempts: int = 5,
+    base: float = 0.25,
+    cap: float = 8.0,
+) -> Tuple[Any, int]:
+    """Call ``retrieve`` with exponential backoff and jitter on transient errors.
+
+    Returns the retrieval result and the number of retries that were needed.
+    A server-provided ``Retry-After`` takes precedence over the computed delay.
+    """
+
+    attempt = 0
+    while True:
+        try:
+            return await client.retrieve(request), attempt
+        except HttpResponseError as exc:
+            attempt += 1
+            delay = _retry_after_seconds(exc)
+            retryable = exc.status_code in _RETRYABLE_STATUS_CODES or delay is not None
+            if not retryable or attempt >= max_attempts:
+                raise
+            if delay is None:
+                delay = min(cap, base * 2 ** (attempt - 1)) + random.uniform(0, 0.25)
+            await asyncio.sleep(delay)
+
+
+async def _retrieve_fanned_out(
+    client: AsyncKBClient,
+    request: KnowledgeBaseRetrievalRequest,
+    semaphore: asyncio.Semaphore,
+) -> Tuple[Any, int]:
+    """Retrieve one per-index request of a fan-out query under the shared cap."""
+
+    async with semaphore:
+        return await _retrieve_with_backoff(client, request)
+
+
+def _run_sync(coro: Awaitable[_T]) -> _T:
+    """Run a coroutine on a private, long-lived loop for synchronous callers.
+
+    ``asyncio.run`` would close the loop after every call and strand the
+    cached aio client, so the console keeps one loop for its whole session.
+    """
+
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None or _sync_loop.is_closed():
+            _sync_loop = asyncio.new_event_loop()
+        return _sync_loop.run_until_complete(coro)
+
+
+@atexit.register
+def _close_kb_client_at_exit() -> None:
+    if _kb_client is None:
+        return
+    loop = _kb_client_loop
+    if loop is not None and not loop.is_closed() and not loop.is_running():
+        loop.run_until_complete(close_kb_client())
+    else:
+        asyncio.run(close_kb_client())
+    if _sync_loop is not None and not _sync_loop.is_closed():
+        _sync_loop.close()
+
+
+# Reasoning effort markers are stateless, so one instance per level is shared.
+_REASONING_INSTANCES: Dict[str, Any] = {
+    "minimal": KnowledgeRetrievalMinimalReasoningEffort(),
+    "low": KnowledgeRetrievalLowReasoningEffort(),
+    "medium": KnowledgeRetrievalMediumReasoningEffort(),
+}
 
 _OUTPUT_MODE_MAP: Dict[str, Tuple[str, KnowledgeRetrievalOutputMode]] = {
     "extractivedata": ("extractiveData", KnowledgeRetrievalOutputMode.EXTRACTIVE_DATA),
     "answersynthesis": ("answerSynthesis", KnowledgeRetrievalOutputMode.ANSWER_SYNTHESIS),
 }
 
+_OUTPUT_MODES_BY_CANONICAL: Dict[str, KnowledgeRetrievalOutputMode] = dict(
+    _OUTPUT_MODE_MAP.values()
+)
+
 
+@lru_cache(maxsize=32)
 def _normalize_reasoning_choice(value: Optional[str]) -> Optional[str]:
     if value is None:
         return None
@@ -86,13 +381,14 @@ def _normalize_reasoning_choice(value: Optional[str]) -> Optional[str]:
     if not normalized:
         return None
 
-    if normalized not in _REASONING_FACTORIES:
+    if normalized not in _REASONING_INSTANCES:
         raise ValueError(
             "retrievalReasoningEffort must be one of: minimal, low, or medium."
         )
-    return _REASONING_CANONICAL[normalized]
+    return normalized
 
 
+@lru_cache(maxsize=32)
 def _normalize_output_mode(value: Optional[str]) -> Optional[str]:
     if value is None:
         return None
@@ -109,54 +405,91 @@ def _normalize_output_mode(value: Optional[str]) -> Optional[str]:
     return _OUTPUT_MODE_MAP[normalized][0]
 
 
+_QUERY_MODES = ("per-source", "kb-level", "fan-out")
+
+
+def _normalize_query_mode(value: Optional[str]) -> str:
+    if value is None:
+        return "per-source"
+
+    normalized = value.strip().lower()
+    if not normalized:
+        return "per-source"
+
+    if normalized not in _QUERY_MODES:
+        raise ValueError("queryMode must be one of: per-source, kb-level, or fan-out.")
+    return normalized
+
+
+@lru_cache(maxsize=1)
+def _source_params() -> List[SearchIndexKnowledgeSourceParams]:
+    """Per-source parameters, built once since they only depend on settings.
+
+    The same list is attached to every per-source request. The SDK only
+    serializes it, so it must never be mutated.
+    """
+
+    settings = _load_settings()
+    return list(
+        SearchIndexKnowledgeSourceParams(
+            knowledge_source_name=settings[index_key],
+            include_references=True,
+            include_reference_source_data=True,
+            always_query_source=False,
+        )
+        for index_key in (
+            "index_insurance",
+            "index_retail",
+            "index_gaming",
+            "index_financials",
+        )
+    )
+
+
+@lru_cache(maxsize=1)
+def _fan_out_params() -> Tuple[SearchIndexKnowledgeSourceParams, ...]:
+    """Per-source parameters for fan-out mode, where every index must be queried."""
+
+    return tuple(
+        SearchIndexKnowledgeSourceParams(
+            knowledge_source_name=params.knowledge_source_name,
+            include_references=True,
+            include_reference_source_data=True,
+            always_query_source=True,
+        )
+        for params in _source_params()
+    )
+
+
 def _build_request(
     question: str,
     reasoning_choice: Optional[str] = None,
     output_mode_choice: Optional[str] = None,
     query_mode: str = "per-source",
+    source_params: Optional[Sequence[SearchIndexKnowledgeSourceParams]] = None,
 ) -> KnowledgeBaseRetrievalRequest:
-    settings = _load_settings()
-    
+    """Build the retrieval request; ``question`` must already be stripped.
+
+    ``source_params`` narrows the request to the given knowledge sources and is
+    used by fan-out mode to issue one request per index.
+    """
+
     request_kwargs: Dict[str, Any] = {
         "messages": [
             KnowledgeBaseMessage(
                 role="user",
-                content=[KnowledgeBaseMessageTextContent(text=question.strip())],
+                content=[KnowledgeBaseMessageTextContent(text=question)],
             )
         ],
         "include_activity": True,
     }
 
     # Build request based on query mode
-    if query_mode == "per-source":
+    if source_params is not None:
+        request_kwargs["knowledge_source_params"] = list(source_params)
+    elif query_mode == "per-source":
         # Original approach: specify per-source parameters with references
-        source_params = [
-            SearchIndexKnowledgeSourceParams(
-                knowledge_source_name=settings["index_insurance"],
-                include_references=True,
-                include_reference_source_data=True,
-                always_query_source=False,
-            ),
-            SearchIndexKnowledgeSourceParams(
-                knowledge_source_name=settings["index_retail"],
-                include_references=True,
-                include_reference_source_data=True,
-                always_query_source=False,
-            ),
-            SearchIndexKnowledgeSourceParams(
-                knowledge_source_name=settings["index_gaming"],
-                include_references=True,
-                include_reference_source_data=True,
-                always_query_source=False,
-            ),
-            SearchIndexKnowledgeSourceParams(
-                knowledge_source_name=settings["index_financials"],
-                include_references=True,
-                include_reference_source_data=True,
-                always_query_source=False,
-            ),
-        ]
-        request_kwargs["knowledge_source_params"] = source_params
+        request_kwargs["knowledge_source_params"] = _source_params()
     else:
         # KB-level approach: override default reasoning effort at request level
         # No per-source params needed - uses KB defaults
@@ -165,70 +498,127 @@ def _build_request(
         request_kwargs["max_output_size"] = 6000
 
     if reasoning_choice:
-        request_kwargs["retrieval_reasoning_effort"] = _REASONING_FACTORIES[
+        request_kwargs["retrieval_reasoning_effort"] = _REASONING_INSTANCES[
             reasoning_choice
-        ]()
+        ]
 
     if output_mode_choice:
-        request_kwargs["output_mode"] = _OUTPUT_MODE_MAP[
-            output_mode_choice.lower() if output_mode_choice else ""
-        ][1]
+        request_kwargs["output_mode"] = _OUTPUT_MODES_BY_CANONICAL[output_mode_choice]
 
     return KnowledgeBaseRetrievalRequest(**request_kwargs)
 
 
-def _get_web_reference_indices(result: Any) -> set:
+# A citation marker like [ref_id:3] together with the spaces that precede it,
+# so dropping a marker never leaves a double space or a space before punctuation.
+_CITATION_RE = re.compile(r" *\[ref_id:(\d+)\]")
+
+
+# Reciprocal Rank Fusion constant; 60 is the value used in the original paper.
+_RRF_K = 60
+_REF_ID_RE = re.compile(r"( *)\[ref_id:(\d+)\]")
+
+
+def _fuse_results(results: Sequence[Any]) -> KnowledgeBaseRetrievalResponse:
+    """Merge single-source retrieval results into one response.
+
+    References are ranked with Reciprocal Rank Fusion (``sum 1 / (k + rank)``
+    over the sources that returned them, keyed by document key) and the
+    ``[ref_id:N]`` markers in each source's answer are rewritten to the fused
+    positions. Answers keep the order of the sources.
+    """
+
+    scores: Dict[Any, float] = {}
+    references_by_key: Dict[Any, Any] = {}
+    keys_by_result: List[List[Any]] = []
+    for result_idx, result in enumerate(results):
+        keys: List[Any] = []
+        for rank, reference in enumerate(getattr(result, "references", None) or [], 1):
+            key = getattr(reference, "doc_key", None) or (result_idx, rank)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (_RRF_K + rank)
+            references_by_key.setdefault(key, reference)
+            keys.append(key)
+        keys_by_result.append(keys)
+
+    # Equal fused scores fall back to the reranker score; sorted() is stable,
+    # so any remaining ties keep source order.
+    fused_keys = sorted(
+        scores,
+        key=lambda key: (
+            scores[key],
+            getattr(references_by_key[key], "reranker_score", None) or 0.0,
+        ),
+        reverse=True,
+    )
+    positions = {key: position for position, key in enumerate(fused_keys)}
+
+    response: List[Any] = []
+    activity: List[Any] = []
+    for result, keys in zip(results, keys_by_result):
+
+        def remap(match, keys=keys):
+            idx = int(match.group(2))
+            # A marker without a matching reference cannot be resolved; drop it.
+            if idx >= len(keys):
+                return ""
+            return f"{match.group(1)}[ref_id:{positions[keys[idx]]}]"
+
+        for message in getattr(result, "response", None) or []:
+            for content_item in getattr(message, "content", None) or []:
+                text = getattr(content_item, "text", None)
+                if text and "[ref_id:" in text:
+                    content_item.text = _REF_ID_RE.sub(remap, text)
+            response.append(message)
+        activity.extend(getattr(result, "activity", None) or [])
+
+    return KnowledgeBaseRetrievalResponse(
+        response=response,
+        activity=activity,
+        references=[references_by_key[key] for key in fused_keys],
+    )
+
+
+def _get_web_reference_indices(reference_fields: List[Tuple[Any, ...]]) -> set:
     """Get the set of reference indices that are web sources."""
-    web_indices = set()
-    references = getattr(result, "references", None)
-    if references:
-        for idx, reference in enumerate(references):
-            source_type = getattr(reference, "type", "unknown")
-            if source_type == "web":
-                web_indices.add(idx)
-    return web_indices
+    return {idx for idx, fields in enumerate(reference_fields) if fields[0] == "web"}
 
 
 def _remove_web_citation_markers(text: str, web_indices: set) -> str:
-    """Remove citation markers for web sources from the text."""
-    import re
-    
-    # Pattern to match citation markers like [ref_id:0], [ref_id:1], etc.
+    """Remove citation markers for web sources from the text in a single pass."""
+
+    if "[ref_id:" not in text:
+        return text.strip()
+
     def replace_citation(match):
-        ref_id = int(match.group(1))
         # Remove the marker if it's a web reference
-        if ref_id in web_indices:
+        if int(match.group(1)) in web_indices:
             return ""
         return match.group(0)
-    
-    # Replace citation markers
-    cleaned = re.sub(r'\[ref_id:(\d+)\]', replace_citation, text)
-    
-    # Clean up any double spaces left by removal
-    cleaned = re.sub(r'  +', ' ', cleaned)
-    
-    # Clean up any spaces before punctuation
-    cleaned = re.sub(r' +([.,;:!?])', r'\1', cleaned)
-    
-    return cleaned.strip()
+
+    return _CITATION_RE.sub(replace_citation, text).strip()
 
 
-def _extract_answer_texts(result: Any) -> List[str]:
+def _extract_answer_texts(result: Any, web_indices: set) -> List[str]:
     texts: List[str] = []
-    web_indices = _get_web_reference_indices(result)
-    
+
+    # Without web references there are no markers to strip, so skip the regex work.
+    if web_indices:
+        clean = lambda text: _remove_web_citation_markers(text.strip(), web_indices)
+    else:
+        clean = str.strip
+
     if getattr(result, "response", None):
         for response_item in result.response:
             if getattr(response_item, "content", None):
-                parts: List[str] = []
-                for content_item in response_item.content:
-                    text_value = getattr(content_item, "text", None)
-                    if text_value:
-                        # Remove web citation markers from the text
-                        cleaned_text = _remove_web_citation_markers(text_value.strip(), web_indices)
-                        parts.append(cleaned_text)
-                if parts:
-                    texts.append("\n\n".join(parts))
+                joined = "\n\n".join(
+                    clean(text_value)
+                    for text_value in (
+                        getattr(content_item, "text", None)
+                        for content_item in response_item.content
+                    )
+                    if text_value
+                )
+                if joined:
+                    texts.append(joined)
     return texts
 
 
@@ -238,8 +628,33 @@ def _clean_content(content: Optional[str]) -> Optional[str]:
     return content.replace("\r\n", "\n").replace("\t", "  ").strip()
 
 
-def _format_reference(idx: int, reference: Any) -> Dict[str, Any]:
-    source_type = getattr(reference, "type", "unknown")
+def _normalize_question(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+# SDK reference models always carry these attributes, so one attrgetter call
+# replaces four getattr lookups with defaults.
+_REFERENCE_FIELDS = operator.attrgetter(
+    "type", "reranker_score", "source_data", "additional_properties"
+)
+
+
+def _reference_fields(reference: Any) -> Tuple[Any, Any, Any, Any]:
+    try:
+        return _REFERENCE_FIELDS(reference)
+    except AttributeError:
+        return (
+            getattr(reference, "type", "unknown"),
+            getattr(reference, "reranker_score", None),
+            getattr(reference, "source_data", None),
+            getattr(reference, "additional_properties", None),
+        )
+
+
+def _format_reference(
+    idx: int, reference: Any, fields: Tuple[Any, Any, Any, Any]
+) -> Dict[str, Any]:
+    source_type, reranker_score, source_data, additional_props = fields
     formatted: Dict[str, Any] = {
         "id": idx,
         "type": source_type,
@@ -248,57 +663,11 @@ def _format_reference(idx: int, reference: Any) -> Dict[str, Any]:
         "citationText": None,
         "note": None,
         "document": None,
-        "relevanceScore": getattr(reference, "reranker_score", None),
+        "relevanceScore": reranker_score,
     }
-
-    source_data = getattr(reference, "source_data", None)
-    additional_props = getattr(reference, "additional_properties", None)
     
-    # Debug logging for azureBlob type
-    if source_type == "azureBlob":
-        print(f"\n{'='*80}")
-        print(f"DEBUG: Azure Blob Reference #{idx}")
-        print(f"{'='*80}")
-        print(f"Source Type: {source_type}")
-        print(f"\nReference object attributes:")
-        print(f"  - dir(reference): {[attr for attr in dir(reference) if not attr.startswith('_')]}")
-        
-        # Print actual attribute values
-        print(f"\nAttribute Values:")
-        print(f"  - id: {getattr(reference, 'id', None)}")
-        print(f"  - blob_url: {getattr(reference, 'blob_url', None)}")
-        print(f"  - reranker_score: {getattr(reference, 'reranker_score', None)}")
-        print(f"  - activity_source: {getattr(reference, 'activity_source', None)}")
-        
-        print(f"\nSource Data:")
-        if source_data:
-            print(f"  Type: {type(source_data)}")
-            if isinstance(source_data, dict):
-                print(f"  Content: {json.dumps(source_data, indent=2)}")
-            else:
-                print(f"  Content: {source_data}")
-                print(f"  Attributes: {[attr for attr in dir(source_data) if not attr.startswith('_')]}")
-        else:
-            print(f"  source_data is None")
-        print(f"\nAdditional Properties:")
-        if additional_props:
-            print(f"  Type: {type(additional_props)}")
-            if isinstance(additional_props, dict):
-                print(f"  Content: {json.dumps(additional_props, indent=2)}")
-            else:
-                print(f"  Content: {additional_props}")
-        else:
-            print(f"  additional_properties is None")
-        
-        # Try as_dict() method to see all data
-        print(f"\nFull reference.as_dict():")
-        try:
-            ref_dict = reference.as_dict()
-            print(f"{json.dumps(ref_dict, indent=2)}")
-        except Exception as e:
-            print(f"  Error calling as_dict(): {e}")
-        
-        print(f"{'='*80}\n")
+    if source_type == "azureBlob" and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("azureBlob reference #%d: %s", idx, reference.as_dict())
 
     if source_type == "web":
         if isinstance(source_data, dict):
@@ -326,31 +695,210 @@ def _format_reference(idx: int, reference: Any) -> Dict[str, Any]:
     return formatted
 
 
-def _format_references(result: Any) -> List[Dict[str, Any]]:
+def _format_references(
+    references: List[Any], reference_fields: List[Tuple[Any, ...]]
+) -> List[Dict[str, Any]]:
     formatted: List[Dict[str, Any]] = []
-    references = getattr(result, "references", None)
-    if not references:
-        return formatted
-
-    # Build a list of valid (non-web) references
-    valid_references: List[Tuple[int, Any]] = []
-    for idx, reference in enumerate(references):
-        source_type = getattr(reference, "type", "unknown")
-        if source_type != "web":
-            valid_references.append((idx, reference))
-    
-    # Format only the valid references with re-indexed IDs
-    for new_idx, (original_idx, reference) in enumerate(valid_references):
-        formatted.append(_format_reference(new_idx, reference))
-    
+
+    # Format only the valid (non-web) references, re-indexing IDs as we go
+    for reference, fields in zip(references, reference_fields):
+        if fields[0] == "web":
+            continue
+        formatted.append(_format_reference(len(formatted), reference, fields))
+
     return formatted
 
 
-def execute_kb_query(
+# Shaping a response costs roughly 10us per reference, so below this many
+# references it is cheaper to run inline than to hop to a worker thread.
+_INLINE_PROCESSING_MAX_REFERENCES = 100
+
+
+def _process_result(result: Any) -> Tuple[List[str], List[Dict[str, Any]]]:
+    # Read each reference's fields once; both the web-marker cleanup and the
+    # citation formatting work from this snapshot.
+    references = getattr(result, "references", None) or []
+    reference_fields = [_reference_fields(reference) for reference in references]
+    web_indices = _get_web_reference_indices(reference_fields)
+    return (
+        _extract_answer_texts(result, web_indices),
+        _format_references(references, reference_fields),
+    )
+
+
+def _timing_payload(
+    prep_ns: int,
+    retrieval_ns: int,
+    processing_ns: int,
+    retry_count: int,
+    cache_hit: bool,
+) -> Dict[str, Any]:
+    # Durations are kept as integer nanoseconds and converted only here.
+    return {
+        "total": (prep_ns + retrieval_ns + processing_ns) / 1e9,
+        "requestPreparation": prep_ns / 1e9,
+        "kbRetrieval": retrieval_ns / 1e9,
+        "responseProcessing": processing_ns / 1e9,
+        "retryCount": retry_count,
+        "cacheHit": cache_hit,
+    }
+
+
+@lru_cache(maxsize=1)
+def _query_embedder() -> Optional[QueryEmbedder]:
+    return QueryEmbedder() if semantic_cache_enabled() else None
+
+
+async def _embed_question(embedder: QueryEmbedder, normalized: str) -> Any:
+    # The embedding client is synchronous; keep it off the event loop.
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, embedder.embed, normalized)
+
+
+def _semantic_cache_for(overrides: Tuple[Any, ...]) -> SemanticCache:
+    cache = _semantic_caches.get(overrides)
+    if cache is None:
+        cache = SemanticCache.load(
+            _semantic_cache_dir(overrides), ttl=_SEMANTIC_CACHE_TTL
+        )
+        _semantic_caches[overrides] = cache
+    return cache
+
+
+def _log_persist_failure(future: "asyncio.Future[None]") -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning("Could not persist the semantic cache: %s", future.exception())
+
+
+def _semantic_cache_dir(overrides: Tuple[Any, ...]) -> Path:
+    # Per knowledge base, so answers never outlive a switch to a different one.
+    # Directory names are digests so request values never shape the path.
+    names = (
+        _load_settings()["knowledge_base_name"],
+        "-".join(str(part or "default") for part in overrides),
+    )
+    return _SEMANTIC_CACHE_DIR.joinpath(
+        *(hashlib.sha256(name.encode("utf-8")).hexdigest()[:16] for name in names)
+    )
+
+
+async def _coalesced(
+    cache_key: Tuple[Any, ...],
+    question: str,
+    execute: Callable[[], Awaitable[Dict[str, Any]]],
+    include_timing: bool,
+) -> Dict[str, Any]:
+    """Share one upstream call among concurrent misses for the same cache key.
+
+    The first caller runs ``execute``; callers arriving while it is in flight
+    await its outcome (result or exception) instead of querying again.
+    """
+
+    loop = asyncio.get_running_loop()
+    inflight = _inflight.get(cache_key)
+    if inflight is not None and inflight.get_loop() is loop:
+        wait_start = time.perf_counter_ns() if include_timing else 0
+        try:
+            shared = await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            if not inflight.cancelled():
+                raise
+            # The leading request was cancelled, not this one; query directly.
+            return await execute()
+        result: Dict[str, Any] = {
+            "question": question,
+            **copy.deepcopy(
+                {key: shared[key] for key in ("answers", "citations", "metadata")}
+            ),
+        }
+        if include_timing:
+            wait_ns = time.perf_counter_ns() - wait_start
+            result["timing"] = _timing_payload(0, wait_ns, 0, 0, cache_hit=False)
+            result["timing"]["coalesced"] = True
+        result["activity"] = shared.get("activity")
+        return result
+
+    future = loop.create_future()
+    _inflight[cache_key] = future
+    try:
+        result = await execute()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as exc:
+        future.set_exception(exc)
+        # Mark the exception retrieved so it is not logged when nobody waited.
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        if _inflight.get(cache_key) is future:
+            del _inflight[cache_key]
+
+
+def _cache_hit_payload(
+    question: str,
+    cached: Dict[str, Any],
+    lookup_ns: int,
+    similarity: Optional[float],
+    include_timing: bool,
+) -> Dict[str, Any]:
+    hit: Dict[str, Any] = {"question": question, **copy.deepcopy(cached)}
+    if include_timing:
+        logger.info(
+            "kb_timing cache_hit total=%.3fms similarity=%s",
+            lookup_ns / 1e6,
+            "exact" if similarity is None else f"{similarity:.3f}",
+        )
+        hit["timing"] = _timing_payload(0, 0, lookup_ns, 0, cache_hit=True)
+        if similarity is not None:
+            hit["timing"]["semanticSimilarity"] = similarity
+    hit["activity"] = None
+    return hit
+
+
+async def _execute_semantic_miss(
+    question: str,
+    cache_key: Tuple[Any, ...],
+    execute: Callable[..., Awaitable[Dict[str, Any]]],
+    t_start: int,
+    include_timing: bool,
+) -> Dict[str, Any]:
+    """Answer an exact-cache miss from the semantic tier, else via ``execute``.
+
+    ``execute`` is a bound :func:`_execute_uncached`; the query vector is
+    passed through so the fresh answer can be stored in the semantic tier.
+    """
+
+    embedder = _query_embedder()
+    if embedder is None:
+        return await execute()
+
+    # The semantic tier is an optimization; if embedding or the lookup
+    # fails, answer from the knowledge base and skip storing a vector.
+    try:
+        query_vector = await _embed_question(embedder, cache_key[0])
+        match = _semantic_cache_for(cache_key[1:]).lookup(query_vector)
+    except Exception as exc:
+        logger.warning("Semantic cache lookup failed: %s", exc)
+        return await execute()
+
+    if match is None:
+        return await execute(query_vector=query_vector)
+    cached, similarity = match
+    _RESULT_CACHE.put(cache_key, cached)
+    lookup_ns = time.perf_counter_ns() - t_start if include_timing else 0
+    return _cache_hit_payload(question, cached, lookup_ns, similarity, include_timing)
+
+
+async def execute_kb_query(
     question: str,
     retrieval_reasoning_effort: Optional[str] = None,
     output_mode: Optional[str] = None,
     query_mode: str = "per-source",
+    include_timing: bool = True,
 ) -> Dict[str, Any]:
     """Execute a single KB query and return structured data for UI layers.
     
@@ -358,58 +906,391 @@ def execute_kb_query(
         question: The question to ask the knowledge base
         retrieval_reasoning_effort: Optional reasoning effort level (minimal, low, medium)
         output_mode: Optional output mode (extractiveData, answerSynthesis)
-        query_mode: Query mode - either "per-source" (specify params per knowledge source)
-                   or "kb-level" (override KB defaults at request level)
+        query_mode: Query mode - "per-source" (specify params per knowledge source),
+                   "kb-level" (override KB defaults at request level) or "fan-out"
+                   (query each index in parallel and fuse the references locally)
+        include_timing: When False, skip the stage clocks and omit the "timing" key
     """
 
-    if not question or not question.strip():
+    question = (question or "").strip()
+    if not question:
         raise ValueError("Question text is required.")
 
     reasoning_choice = _normalize_reasoning_choice(retrieval_reasoning_effort)
     output_mode_choice = _normalize_output_mode(output_mode)
+    query_mode = _normalize_query_mode(query_mode)
+    clock = time.perf_counter_ns
 
-    request_timing_start = time.perf_counter()
-    request = _build_request(question, reasoning_choice, output_mode_choice, query_mode)
-    request_prep_time = time.perf_counter() - request_timing_start
+    cache_key: Optional[Tuple[Any, ...]] = None
+    if reasoning_choice not in _UNCACHED_REASONING:
+        lookup_start = clock() if include_timing else 0
+        normalized = _normalize_question(question)
+        cache_key = (normalized, reasoning_choice, output_mode_choice, query_mode)
+        cached = _RESULT_CACHE.get(cache_key)
+        if cached is not None:
+            lookup_ns = clock() - lookup_start if include_timing else 0
+            return _cache_hit_payload(question, cached, lookup_ns, None, include_timing)
+
+    # On a miss, the cache lookup (including any embedding call) counts as
+    # request preparation.
+    if cache_key is not None:
+        t_start = lookup_start
+    else:
+        t_start = clock() if include_timing else 0
+    execute = partial(
+        _execute_uncached,
+        question,
+        reasoning_choice,
+        output_mode_choice,
+        query_mode,
+        cache_key,
+        query_vector=None,
+        t_start=t_start,
+        include_timing=include_timing,
+    )
+    if cache_key is None:
+        return await execute()
+    # The semantic lookup runs inside the shared call, so concurrent identical
+    # misses also share one embedding request.
+    semantic_then_execute = partial(
+        _execute_semantic_miss, question, cache_key, execute, t_start, include_timing
+    )
+    return await _coalesced(cache_key, question, semantic_then_execute, include_timing)
 
-    retrieval_start = time.perf_counter()
-    result = _get_kb_client().retrieve(request)
-    retrieval_time = time.perf_counter() - retrieval_start
 
-    processing_start = time.perf_counter()
-    answers = _extract_answer_texts(result)
-    citations = _format_references(result)
-    processing_time = time.perf_counter() - processing_start
+async def _execute_uncached(
+    question: str,
+    reasoning_choice: Optional[str],
+    output_mode_choice: Optional[str],
+    query_mode: str,
+    cache_key: Optional[Tuple[Any, ...]],
+    query_vector: Any,
+    t_start: int,
+    include_timing: bool,
+) -> Dict[str, Any]:
+    """Run the retrieval for a cache miss, store the result and shape the payload."""
+
+    clock = time.perf_counter_ns
+    if query_mode == "fan-out":
+        requests = [
+            _build_request(
+                question,
+                reasoning_choice,
+                output_mode_choice,
+                query_mode,
+                source_params=(params,),
+            )
+            for params in _fan_out_params()
+        ]
+    else:
+        requests = [
+            _build_request(question, reasoning_choice, output_mode_choice, query_mode)
+        ]
+    t_built = clock() if include_timing else 0
+
+    client = await _get_kb_client()
+    # Fan-out requests overlap, so retrieval costs the slowest index rather
+    # than the sum of all of them.
+    if query_mode == "fan-out":
+        # Shared by every fan-out query on this loop (see _get_kb_client).
+        semaphore = _fan_out_semaphore
+        outcomes = await asyncio.gather(
+            *(_retrieve_fanned_out(client, request, semaphore) for request in requests)
+        )
+    else:
+        outcomes = [await _retrieve_with_backoff(client, requests[0])]
+    retry_count = sum(retries for _, retries in outcomes)
+    t_retrieved = clock() if include_timing else 0
+
+    results = [outcome for outcome, _ in outcomes]
+    result = results[0] if len(results) == 1 else _fuse_results(results)
+    reference_count = len(getattr(result, "references", None) or ())
+    if reference_count > _INLINE_PROCESSING_MAX_REFERENCES:
+        # Large responses are shaped in a worker thread so other requests on
+        # the event loop are not stalled behind them.
+        loop = asyncio.get_running_loop()
+        answers, citations = await loop.run_in_executor(
+            None, _process_result, result
+        )
+    else:
+        answers, citations = _process_result(result)
+    t_processed = clock() if include_timing else 0
 
-    total_time = request_prep_time + retrieval_time + processing_time
     settings = _load_settings()
+    metadata = {
+        "knowledgeBaseName": settings["knowledge_base_name"],
+        "searchEndpoint": settings["search_url"],
+        "queryMode": query_mode,
+        "requestOverrides": {
+            "retrievalReasoningEffort": reasoning_choice,
+            "knowledgeRetrievalOutputMode": output_mode_choice,
+        },
+    }
+    if cache_key is not None:
+        # The SDK activity objects are not cached; only the JSON-friendly parts.
+        stored = copy.deepcopy(
+            {"answers": answers, "citations": citations, "metadata": metadata}
+        )
+        _RESULT_CACHE.put(cache_key, stored)
+        if query_vector is not None:
+            semantic_cache = _semantic_cache_for(cache_key[1:])
+            stored_at = semantic_cache.add(query_vector, stored)
+            # Disk writes happen in a worker thread; the answer does not wait.
+            future = asyncio.get_running_loop().run_in_executor(
+                None, semantic_cache.append_to_disk, query_vector, stored, stored_at
+            )
+            future.add_done_callback(_log_persist_failure)
 
-    return {
-        "question": question.strip(),
+    payload: Dict[str, Any] = {
+        "question": question,
         "answers": answers,
         "citations": citations,
-        "timing": {
-            "total": total_time,
-            "requestPreparation": request_prep_time,
-            "kbRetrieval": retrieval_time,
-            "responseProcessing": processing_time,
-        },
-        "metadata": {
-            "knowledgeBaseName": settings["knowledge_base_name"],
-            "searchEndpoint": settings["search_url"],
-            "queryMode": query_mode,
-            "requestOverrides": {
-                "retrievalReasoningEffort": reasoning_choice,
-                "knowledgeRetrievalOutputMode": output_mode_choice,
-            },
-        },
-        "activity": getattr(result, "activity", None),
     }
+    if include_timing:
+        prep_ns = t_built - t_start
+        retrieval_ns = t_retrieved - t_built
+        processing_ns = t_processed - t_retrieved
+        logger.info(
+            "kb_timing total=%.3fms prep=%.3fms retrieval=%.3fms processing=%.3fms retries=%d",
+            (t_processed - t_start) / 1e6,
+            prep_ns / 1e6,
+            retrieval_ns / 1e6,
+            processing_ns / 1e6,
+            retry_count,
+        )
+        payload["timing"] = _timing_payload(
+            prep_ns, retrieval_ns, processing_ns, retry_count, cache_hit=False
+        )
+    payload["metadata"] = metadata
+    payload["activity"] = getattr(result, "activity", None)
+    return payload
 
 
-def get_kb_configuration() -> Dict[str, Any]:
-    """Expose key configuration values for UI layers."""
+async def execute_kb_query_batch(
+    questions: List[str],
+    retrieval_reasoning_effort: Optional[str] = None,
+    output_mode: Optional[str] = None,
+    query_mode: str = "per-source",
+    timeout: Optional[float] = _QUERY_TIMEOUT_SECONDS,
+    return_exceptions: bool = False,
+    include_timing: bool = True,
+) -> List[Any]:
+    """Run several KB queries concurrently and return results in input order.
+
+    Concurrency is bounded by ``KB_MAX_CONCURRENCY`` and each query is limited
+    to ``timeout`` seconds. With ``return_exceptions`` set, a failed query
+    yields its exception in place instead of failing the whole batch.
+    """
+
+    semaphore = asyncio.Semaphore(_MAX_CONCURRENCY)
+
+    async def _run_one(question: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await asyncio.wait_for(
+                execute_kb_query(
+                    question,
+                    retrieval_reasoning_effort=retrieval_reasoning_effort,
+                    output_mode=output_mode,
+                    query_mode=query_mode,
+                    include_timing=include_timing,
+                ),
+                timeout=timeout,
+            )
+
+    return await asyncio.gather(
+        *(_run_one(question) for question in questions),
+        return_exceptions=return_exceptions,
+    )
+
+
+def warm_cache_enabled() -> bool:
+    """Pre-answering the warm-up questions costs one query each, so it is opt-in."""
+
+    return os.getenv("KB_WARM_CACHE", "0") == "1"
+
+
+async def warm_cache(path: Path = _WARM_QUERIES_PATH) -> int:
+    """Answer the questions listed in ``path`` so later askers hit the cache.
 
+    The file holds a JSON array of question strings. Questions already in the
+    cache cost nothing; with the semantic cache enabled, paraphrases of them
+    are served too, and the answers persist across restarts. Returns the number
+    of questions answered; failures are logged and skipped.
+    """
+
+    questions = orjson.loads(path.read_bytes())
+    if not isinstance(questions, list) or not all(
+        isinstance(question, str) for question in questions
+    ):
+        raise ValueError(f"{path} must contain a JSON array of question strings.")
+    results = await execute_kb_query_batch(
+        questions, return_exceptions=True, include_timing=False
+    )
+    warmed = 0
+    for question, result in zip(questions, results):
+        if isinstance(result, Exception):
+            logger.warning("Could not warm the cache for %r: %s", question, result)
+        else:
+            warmed += 1
+    logger.info("Warmed the answer cache with %d of %d questions", warmed, len(questions))
+    return warmed
+
+
+async def execute_kb_query_stream(
+    question: str,
+    retrieval_reasoning_effort: Optional[str] = None,
+    output_mode: Optional[str] = None,
+    query_mode: str = "per-source",
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield a KB query result as a sequence of events.
+
+    One ``answer_chunk`` event is emitted per answer segment, followed by a
+    single ``citations`` event and a final ``timing`` event that also carries
+    the request metadata. The retrieve API in this SDK version returns the
+    synthesized answer in one response, so segments are yielded as soon as that
+    response arrives rather than token by token.
+    """
+
+    result = await execute_kb_query(
+        question,
+        retrieval_reasoning_effort=retrieval_reasoning_effort,
+        output_mode=output_mode,
+        query_mode=query_mode,
+    )
+    for text in result["answers"]:
+        yield {"event": "answer_chunk", "text": text}
+    yield {"event": "citations", "citations": result["citations"]}
+    yield {
+        "event": "timing",
+        "question": result["question"],
+        "timing": result.get("timing"),
+        "metadata": result["metadata"],
+    }
+
+
+def _truncate(text: Optional[str], max_chars: int) -> Optional[str]:
+    if text is None or len(text) <= max_chars:
+        return text
+    return text[:max_chars] + "…"
+
+
+def _trim_citation(
+    citation: Dict[str, Any], max_chars: int = _CITATION_MAX_CHARS
+) -> Dict[str, Any]:
+    """Return ``citation`` with its long text fields cut to ``max_chars`` for the web UI."""
+
+    text, note = citation["citationText"], citation["note"]
+    trimmed_text, trimmed_note = _truncate(text, max_chars), _truncate(note, max_chars)
+    if trimmed_text is text and trimmed_note is note:
+        return citation
+    return {**citation, "citationText": trimmed_text, "note": trimmed_note}
+
+
+def _orjson_default(obj: Any) -> Any:
+    # SDK models (e.g. the activity records) expose a JSON-ready as_dict().
+    as_dict = getattr(obj, "as_dict", None)
+    if callable(as_dict):
+        return as_dict()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+async def execute_kb_query_json(
+    question: str,
+    retrieval_reasoning_effort: Optional[str] = None,
+    output_mode: Optional[str] = None,
+    query_mode: str = "per-source",
+) -> bytes:
+    """Execute a KB query and return the result serialized as JSON bytes.
+
+    Uses orjson, which is considerably faster than the stdlib encoder for the
+    answer/citation payloads and yields bytes ready for an HTTP response body.
+    Citation text is trimmed to ``KB_CITATION_MAX_CHARS`` characters.
+    """
+
+    result = await execute_kb_query(
+        question,
+        retrieval_reasoning_effort=retrieval_reasoning_effort,
+        output_mode=output_mode,
+        query_mode=query_mode,
+    )
+    result["citations"] = [_trim_citation(citation) for citation in result["citations"]]
+    return orjson.dumps(
+        result,
+        default=_orjson_default,
+        option=orjson.OPT_NON_STR_KEYS,
+    )
+
+
+async def execute_kb_query_event_stream(
+    question: str,
+    retrieval_reasoning_effort: Optional[str] = None,
+    output_mode: Optional[str] = None,
+    query_mode: str = "per-source",
+) -> AsyncIterator[bytes]:
+    """Yield the events of :func:`execute_kb_query_stream` as SSE frames.
+
+    Each event becomes one ``data: <json>`` frame, so the web client can render
+    the answer before the citations and metrics have been encoded and sent.
+    """
+
+    async for event in execute_kb_query_stream(
+        question,
+        retrieval_reasoning_effort=retrieval_reasoning_effort,
+        output_mode=output_mode,
+        query_mode=query_mode,
+    ):
+        if event["event"] == "citations":
+            event["citations"] = [
+                _trim_citation(citation) for citation in event["citations"]
+            ]
+        payload = orjson.dumps(
+            event,
+            default=_orjson_default,
+            option=orjson.OPT_NON_STR_KEYS,
+        )
+        yield b"data: " + payload + b"\n\n"
+
+
+def execute_kb_query_sync(
+    question: str,
+    retrieval_reasoning_effort: Optional[str] = None,
+    output_mode: Optional[str] = None,
+    query_mode: str = "per-source",
+) -> Dict[str, Any]:
+    """Blocking wrapper around :func:`execute_kb_query` for the console app."""
+
+    return _run_sync(
+        execute_kb_query(
+            question,
+            retrieval_reasoning_effort=retrieval_reasoning_effort,
+            output_mode=output_mode,
+            query_mode=query_mode,
+        )
+    )
+
+
+def execute_kb_query_batch_sync(
+    questions: List[str],
+    retrieval_reasoning_effort: Optional[str] = None,
+    output_mode: Optional[str] = None,
+    query_mode: str = "per-source",
+    return_exceptions: bool = False,
+) -> List[Any]:
+    """Blocking wrapper around :func:`execute_kb_query_batch` for the console app."""
+
+    return _run_sync(
+        execute_kb_query_batch(
+            questions,
+            retrieval_reasoning_effort=retrieval_reasoning_effort,
+            output_mode=output_mode,
+            query_mode=query_mode,
+            return_exceptions=return_exceptions,
+        )
+    )
+
+
+@lru_cache(maxsize=1)
+def _kb_configuration() -> Dict[str, Any]:
     settings = _load_settings()
     return {
         "searchEndpoint": settings["search_url"],
@@ -420,4 +1301,53 @@ def get_kb_configuration() -> Dict[str, Any]:
             settings["index_gaming"],
             settings["index_financials"],
         ],
-    }
\ No newline at end of file
+    }
+
+
+def get_kb_configuration() -> Dict[str, Any]:
+    """Expose key configuration values for UI layers.
+
+    The payload is built once; callers receive a copy they are free to mutate.
+    """
+
+    config = _kb_configuration()
+    return {**config, "indexes": list(config["indexes"])}
+
+
+# Called after a configuration reset, for caches kept outside this module.
+_configuration_reset_hooks: List[Callable[[], None]] = []
+
+
+def register_configuration_reset_hook(hook: Callable[[], None]) -> None:
+    """Run ``hook`` whenever cached KB settings are reset.
+
+    Callers that cache values derived from :func:`get_kb_configuration` (such
+    as a rendered page) register a hook that clears them.
+    """
+
+    _configuration_reset_hooks.append(hook)
+
+
+async def _reset_kb_configuration_cache() -> None:
+    """Forget cached settings and everything built from them.
+
+    The shared client is closed, so the next query reconnects with the current
+    environment, and answers cached for the previous configuration are dropped.
+    Tuning values (the ``KB_*`` variables) are read at import and keep their
+    values. Registered reset hooks run last. Settings are treated as fixed for the life of the process; this
+    exists for tests and for tools that change the environment in-process.
+    """
+
+    await close_kb_client()
+    for cached in (
+        _load_settings,
+        _kb_configuration,
+        _source_params,
+        _fan_out_params,
+        _query_embedder,
+    ):
+        cached.cache_clear()
+    _RESULT_CACHE.clear()
+    _semantic_caches.clear()
+    for hook in _configuration_reset_hooks:
+        hook()
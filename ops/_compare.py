@@ -0,0 +1,25 @@
+"""Definition comparison shared by the ops scripts that skip unchanged PUTs."""
+
+# Credentials the service never echoes back on a GET; comparing them would
+# make every definition that sets one look out of date.
+SECRET_FIELDS = frozenset({"api_key"})
+
+
+def matches(desired, existing) -> bool:
+    """Return True when every value we set is already present on the server.
+
+    Keys the service adds (etags, defaults) are ignored, as are secret fields.
+    """
+    if isinstance(desired, dict):
+        return isinstance(existing, dict) and all(
+            matches(value, existing.get(key))
+            for key, value in desired.items()
+            if key not in SECRET_FIELDS
+        )
+    if isinstance(desired, list):
+        return (
+            isinstance(existing, list)
+            and len(desired) == len(existing)
+            and all(matches(d, e) for d, e in zip(desired, existing))
+        )
+    return desired == existing
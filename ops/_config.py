@@ -0,0 +1,46 @@
+"""Shared configuration for the ops scripts.
+
+The project's .env file and the environment are read once per process and
+exposed as an immutable ``Config``. Scripts call ``get_config()`` instead of
+repeating ``load_dotenv()`` and ``os.getenv`` lookups.
+"""
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from dotenv import load_dotenv
+
+
+@dataclass(frozen=True)
+class Config:
+    search_url: Optional[str]
+    search_api_key: Optional[str]
+    knowledge_base_name: str
+    index_insurance: str
+    index_retail: str
+    index_gaming: str
+    index_financials: str
+    aoai_endpoint: Optional[str]
+    aoai_deployment: Optional[str]
+    aoai_model: Optional[str]
+    aoai_api_key: Optional[str]
+
+
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    load_dotenv()
+    return Config(
+        search_url=os.getenv("search_url"),
+        search_api_key=os.getenv("search_api_key"),
+        knowledge_base_name=os.getenv("knowledge_base_name", "contoso-multi-index-kb"),
+        index_insurance=os.getenv("index_insurance", "contoso-insurance-faq-index"),
+        index_retail=os.getenv("index_retail", "contoso-retail-index"),
+        index_gaming=os.getenv("index_gaming", "contoso-gaming-index"),
+        index_financials=os.getenv("index_financials", "nykaa-financials-indexer"),
+        aoai_endpoint=os.getenv("az-openai_endpoint"),
+        aoai_deployment=os.getenv("az-openai-deployment"),
+        aoai_model=os.getenv("az-openai-model"),
+        aoai_api_key=os.getenv("az-openai-key"),
+    )
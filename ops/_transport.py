@@ -0,0 +1,21 @@
+"""HTTP transport shared by the ops scripts' Azure SDK clients."""
+
+import requests
+from azure.core.pipeline.transport import RequestsTransport
+from requests.adapters import HTTPAdapter
+
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 64
+
+
+def requests_transport() -> RequestsTransport:
+    """Return a transport over one keep-alive session with a sized connection pool.
+
+    Retries on 429/503 are left to the SDK's retry policy, which honours
+    Retry-After; the adapter itself does not retry, so attempts never compound.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return RequestsTransport(session=session, session_owner=True)
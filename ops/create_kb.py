@@ -37,9 +37,10 @@ Output:
     - Azure OpenAI model configuration
 """
 
-import os
-from dotenv import load_dotenv
+from dataclasses import asdict
+
 from azure.core.credentials import AzureKeyCredential
+from azure.core.exceptions import ResourceNotFoundError
 from azure.identity import DefaultAzureCredential
 from azure.search.documents.indexes import SearchIndexClient
 from azure.search.documents.indexes.models import (
@@ -51,20 +52,54 @@ from azure.search.documents.indexes.models import (
     KnowledgeRetrievalLowReasoningEffort
 )
 
-# Load environment variables from .env file
-load_dotenv()
-
-# Get configuration from environment variables
-search_url = os.getenv("search_url")
-search_api_key = os.getenv("search_api_key")
-index_insurance = os.getenv("index_insurance", "contoso-insurance-faq-index")
-index_retail = os.getenv("index_retail", "contoso-retail-index")
-index_gaming = os.getenv("index_gaming", "contoso-gaming-index")
-index_financials = os.getenv("index_financials", "nykaa-financials-indexer")
-aoai_endpoint = os.getenv("az-openai_endpoint")
-aoai_deployment = os.getenv("az-openai-deployment")
-aoai_model = os.getenv("az-openai-model")
-aoai_api_key = os.getenv("az-openai-key")
+from _compare import matches
+from _config import get_config
+from _transport import requests_transport
+
+# Get configuration from .env and the environment
+cfg = get_config()
+search_url = cfg.search_url
+search_api_key = cfg.search_api_key
+aoai_endpoint = cfg.aoai_endpoint
+aoai_deployment = cfg.aoai_deployment
+aoai_model = cfg.aoai_model
+
+RETRIEVAL_INSTR_TEMPLATE = (
+    "Use the {index_insurance} knowledge source for queries about Contoso Insurance policies, "
+    "use the {index_retail} knowledge source for queries about Contoso Retail, "
+    "use the {index_gaming} knowledge source for queries about Contoso Gaming, "
+    "use the {index_financials} knowledge source for queries about Nykaa's financial performance, "
+    "and use bing-web-search-ks for current events and real-time web information."
+)
+
+
+def build_kb(cfg: dict) -> KnowledgeBase:
+    """Build the knowledge base definition from index names and Azure OpenAI settings."""
+    aoai_params = AzureOpenAIVectorizerParameters(
+        resource_url=cfg["aoai_endpoint"],
+        deployment_name=cfg["aoai_deployment"],
+        model_name=cfg["aoai_model"],
+        api_key=cfg["aoai_api_key"]
+    )
+
+    return KnowledgeBase(
+        name = "contoso-multi-index-kb",
+        description = "This knowledge base handles questions directed at four sample indexes and includes Bing web search for real-time information.",
+        retrieval_instructions = RETRIEVAL_INSTR_TEMPLATE.format(**cfg),
+        answer_instructions = "Provide a two sentence concise and informative answer based on the retrieved documents.",
+        output_mode = KnowledgeRetrievalOutputMode.ANSWER_SYNTHESIS,
+        knowledge_sources = [
+            KnowledgeSourceReference(name = cfg["index_insurance"]),
+            KnowledgeSourceReference(name = cfg["index_retail"]),
+            KnowledgeSourceReference(name = cfg["index_gaming"]),
+            KnowledgeSourceReference(name = cfg["index_financials"]),
+            KnowledgeSourceReference(name = "bing-web-search-ks"),
+        ],
+        models = [KnowledgeBaseAzureOpenAIModel(azure_open_ai_parameters = aoai_params)],
+        encryption_key = None,
+        retrieval_reasoning_effort = KnowledgeRetrievalLowReasoningEffort(),
+    )
+
 
 # Use API key for search authentication
 search_credential = AzureKeyCredential(search_api_key)
@@ -74,38 +109,23 @@ print(f"Connecting to: {search_url}")
 print(f"Using Azure OpenAI endpoint: {aoai_endpoint}")
 print(f"Using deployment: {aoai_deployment}, model: {aoai_model}\n")
 
-index_client = SearchIndexClient(endpoint=search_url, credential=search_credential)
-
-aoai_params = AzureOpenAIVectorizerParameters(
-    resource_url=aoai_endpoint,
-    deployment_name=aoai_deployment,
-    model_name=aoai_model,
-    api_key=aoai_api_key
+index_client = SearchIndexClient(
+    endpoint=search_url,
+    credential=search_credential,
+    transport=requests_transport(),
 )
 
-knowledge_base = KnowledgeBase(
-    name = "contoso-multi-index-kb",
-    description = "This knowledge base handles questions directed at four sample indexes and includes Bing web search for real-time information.",
-    retrieval_instructions = (
-        f"Use the {index_insurance} knowledge source for queries about Contoso Insurance policies, "
-        f"use the {index_retail} knowledge source for queries about Contoso Retail, "
-        f"use the {index_gaming} knowledge source for queries about Contoso Gaming, "
-        f"use the {index_financials} knowledge source for queries about Nykaa's financial performance, "
-        f"and use bing-web-search-ks for current events and real-time web information."
-    ),
-    answer_instructions = "Provide a two sentence concise and informative answer based on the retrieved documents.",
-    output_mode = KnowledgeRetrievalOutputMode.ANSWER_SYNTHESIS,
-    knowledge_sources = [
-        KnowledgeSourceReference(name = index_insurance),
-        KnowledgeSourceReference(name = index_retail),
-        KnowledgeSourceReference(name = index_gaming),
-        KnowledgeSourceReference(name = index_financials),
-        KnowledgeSourceReference(name = "bing-web-search-ks"),
-    ],
-    models = [KnowledgeBaseAzureOpenAIModel(azure_open_ai_parameters = aoai_params)],
-    encryption_key = None,
-    retrieval_reasoning_effort = KnowledgeRetrievalLowReasoningEffort,
-)
+knowledge_base = build_kb(asdict(cfg))
+
+# Skip the PUT when the service already holds this definition. The Azure OpenAI
+# key is not returned by the GET, so a rotated key alone does not trigger a PUT.
+try:
+    existing_kb = index_client.get_knowledge_base(knowledge_base.name)
+except ResourceNotFoundError:
+    existing_kb = None
 
-index_client.create_or_update_knowledge_base(knowledge_base)
-print(f"Knowledge base '{knowledge_base.name}' created or updated successfully.")
\ No newline at end of file
+if existing_kb is not None and matches(knowledge_base.as_dict(), existing_kb.as_dict()):
+    print(f"Knowledge base '{knowledge_base.name}' is already up to date.")
+else:
+    index_client.create_or_update_knowledge_base(knowledge_base)
+    print(f"Knowledge base '{knowledge_base.name}' created or updated successfully.")
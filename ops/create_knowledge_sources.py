@@ -28,8 +28,8 @@ Output:
     - Bing web search knowledge source
 """
 
-import os
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+
 from azure.core.credentials import AzureKeyCredential
 from azure.search.documents.indexes import SearchIndexClient
 from azure.search.documents.indexes.models import (
@@ -39,25 +39,40 @@ from azure.search.documents.indexes.models import (
     WebKnowledgeSourceParameters
 )
 
-# Load environment variables from .env file
-load_dotenv()
+from _compare import matches
+from _config import get_config
+from _transport import requests_transport
 
-# Get configuration from environment variables
-search_url = os.getenv("search_url")
-search_api_key = os.getenv("search_api_key")
-index_insurance = os.getenv("index_insurance", "contoso-insurance-faq-index")
-index_retail = os.getenv("index_retail", "contoso-retail-index")
-index_gaming = os.getenv("index_gaming", "contoso-gaming-index")
-index_financials = os.getenv("index_financials", "nykaa-financials-indexer")
+# Get configuration from .env and the environment
+cfg = get_config()
+search_url = cfg.search_url
+search_api_key = cfg.search_api_key
+index_insurance = cfg.index_insurance
+index_retail = cfg.index_retail
+index_gaming = cfg.index_gaming
+index_financials = cfg.index_financials
 
 # Use API key for search authentication
 search_credential = AzureKeyCredential(search_api_key)
 
-# Create search index client
-index_client = SearchIndexClient(endpoint=search_url, credential=search_credential)
+# Create search index client; one keep-alive session is shared by all calls
+index_client = SearchIndexClient(
+    endpoint=search_url,
+    credential=search_credential,
+    transport=requests_transport(),
+)
 
 print(f"Creating knowledge sources in: {search_url}\n")
 
+
+def _is_up_to_date(knowledge_source) -> bool:
+    current = existing_sources.get(knowledge_source.name)
+    return current is not None and matches(knowledge_source.as_dict(), current.as_dict())
+
+
+# Fetch existing knowledge sources once so unchanged ones can be skipped
+existing_sources = {ks.name: ks for ks in index_client.list_knowledge_sources()}
+
 # Define the search index knowledge sources to create
 search_index_sources = [
     {
@@ -84,21 +99,34 @@ search_index_sources = [
 
 # Create search index knowledge sources
 print("Creating search index knowledge sources...")
+pending = []
 for ks_info in search_index_sources:
-    try:
-        # Create SearchIndexKnowledgeSource with parameters
-        ks_params = SearchIndexKnowledgeSourceParameters(search_index_name=ks_info["index_name"])
-        
-        knowledge_source = SearchIndexKnowledgeSource(
-            name=ks_info["name"],
-            description=ks_info["description"],
-            search_index_parameters=ks_params
-        )
-        
-        result = index_client.create_or_update_knowledge_source(knowledge_source)
-        print(f"  ✓ Knowledge source '{ks_info['name']}' created successfully")
-    except Exception as e:
-        print(f"  ✗ Error creating knowledge source '{ks_info['name']}': {str(e)}")
+    # Create SearchIndexKnowledgeSource with parameters
+    ks_params = SearchIndexKnowledgeSourceParameters(search_index_name=ks_info["index_name"])
+
+    knowledge_source = SearchIndexKnowledgeSource(
+        name=ks_info["name"],
+        description=ks_info["description"],
+        search_index_parameters=ks_params
+    )
+
+    if _is_up_to_date(knowledge_source):
+        print(f"  ✓ Knowledge source '{ks_info['name']}' is already up to date")
+        continue
+    pending.append(knowledge_source)
+
+# Independent sources are created concurrently rather than one round-trip at a time
+with ThreadPoolExecutor(max_workers=4) as executor:
+    futures = [
+        (knowledge_source, executor.submit(index_client.create_or_update_knowledge_source, knowledge_source))
+        for knowledge_source in pending
+    ]
+    for knowledge_source, future in futures:
+        try:
+            future.result()
+            print(f"  ✓ Knowledge source '{knowledge_source.name}' created successfully")
+        except Exception as e:
+            print(f"  ✗ Error creating knowledge source '{knowledge_source.name}': {str(e)}")
 
 # Create web knowledge source for Bing search
 print("\nCreating web knowledge source...")
@@ -118,8 +146,11 @@ try:
         )
     )
     
-    result = index_client.create_or_update_knowledge_source(web_knowledge_source)
-    print(f"  ✓ Web knowledge source '{web_knowledge_source.name}' created successfully")
+    if _is_up_to_date(web_knowledge_source):
+        print(f"  ✓ Web knowledge source '{web_knowledge_source.name}' is already up to date")
+    else:
+        index_client.create_or_update_knowledge_source(web_knowledge_source)
+        print(f"  ✓ Web knowledge source '{web_knowledge_source.name}' created successfully")
     print("     Note: This knowledge source searches the entire public internet via Bing.")
 except Exception as e:
     print(f"  ✗ Error creating web knowledge source: {str(e)}")
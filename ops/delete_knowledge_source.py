@@ -12,13 +12,15 @@ utilities.
 """
 
 import argparse
-import os
 import sys
-from typing import List, Tuple, Any
+from typing import TYPE_CHECKING, Any, List, Tuple
 
-from dotenv import load_dotenv
-from azure.core.credentials import AzureKeyCredential
-from azure.search.documents.indexes import SearchIndexClient
+# The Azure SDK and the shared config (which loads .env) are imported in
+# main() so that --help and argument errors return without loading them.
+if TYPE_CHECKING:
+    from azure.search.documents.indexes import SearchIndexClient
+
+    from _config import Config
 
 
 def _parse_args() -> argparse.Namespace:
@@ -32,15 +34,15 @@ def _parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--knowledge-base-name",
         "-k",
-        default=os.getenv("knowledge_base_name", "contoso-multi-index-kb"),
+        default=None,
         help="Knowledge base name (defaults to knowledge_base_name from .env)",
     )
     return parser.parse_args()
 
 
-def _load_search_settings() -> Tuple[str, str]:
-    search_url = os.getenv("search_url")
-    search_key = os.getenv("search_api_key")
+def _load_search_settings(cfg: "Config") -> Tuple[str, str]:
+    search_url = cfg.search_url
+    search_key = cfg.search_api_key
 
     if not search_url:
         raise ValueError("search_url is required; set it in your .env file.")
@@ -51,40 +53,65 @@ def _load_search_settings() -> Tuple[str, str]:
 
 
 def _remove_source(
-    client: SearchIndexClient,
+    client: "SearchIndexClient",
     kb_name: str,
     source_name: str,
+    attempts: int = 2,
 ) -> None:
-    knowledge_base = client.get_knowledge_base(kb_name)
-    if not knowledge_base:
-        raise RuntimeError(f"Knowledge base '{kb_name}' was not found.")
-
-    sources: List[Any] = list(knowledge_base.knowledge_sources or [])
-    remaining = [source for source in sources if getattr(source, "name", None) != source_name]
-
-    if len(remaining) == len(sources):
-        print(f"Knowledge source '{source_name}' was not referenced by '{kb_name}'.")
+    from azure.core import MatchConditions
+    from azure.core.exceptions import ResourceModifiedError
+
+    for attempt in range(1, attempts + 1):
+        knowledge_base = client.get_knowledge_base(kb_name)
+        if not knowledge_base:
+            raise RuntimeError(f"Knowledge base '{kb_name}' was not found.")
+
+        sources: List[Any] = list(knowledge_base.knowledge_sources or [])
+        remaining = [source for source in sources if getattr(source, "name", None) != source_name]
+
+        if len(remaining) == len(sources):
+            print(f"Knowledge source '{source_name}' was not referenced by '{kb_name}'.")
+            return
+
+        knowledge_base.knowledge_sources = remaining
+        try:
+            # Only write if nobody changed the knowledge base since we read it;
+            # the SDK sends the e_tag from the fetched model as If-Match.
+            client.create_or_update_knowledge_base(
+                knowledge_base, match_condition=MatchConditions.IfNotModified
+            )
+        except ResourceModifiedError:
+            if attempt == attempts:
+                raise
+            print(f"Knowledge base '{kb_name}' changed while updating; retrying.")
+            continue
+        print(
+            f"Knowledge source '{source_name}' removed from knowledge base '{kb_name}'."
+        )
         return
 
-    knowledge_base.knowledge_sources = remaining
-    client.create_or_update_knowledge_base(knowledge_base)
-    print(
-        f"Knowledge source '{source_name}' removed from knowledge base '{kb_name}'."
-    )
-
 
 def main() -> None:
-    load_dotenv()
     args = _parse_args()
-    search_url, search_key = _load_search_settings()
+
+    from azure.core.credentials import AzureKeyCredential
+    from azure.search.documents.indexes import SearchIndexClient
+
+    from _config import get_config
+    from _transport import requests_transport
+
+    cfg = get_config()
+    kb_name = args.knowledge_base_name or cfg.knowledge_base_name
+    search_url, search_key = _load_search_settings(cfg)
 
     client = SearchIndexClient(
         endpoint=search_url,
         credential=AzureKeyCredential(search_key),
+        transport=requests_transport(),
     )
 
     try:
-        _remove_source(client, args.knowledge_base_name, args.knowledge_source_name)
+        _remove_source(client, kb_name, args.knowledge_source_name)
     except Exception as exc:  # pragma: no cover - tooling convenience
         print(f"Error: {exc}")
         sys.exit(1)
@@ -7,7 +7,7 @@ Environment Variables Required:
     search_url: Azure AI Search service endpoint
 
 Authentication:
-    Uses DefaultAzureCredential (managed identity or Azure CLI credentials)
+    Tries managed identity first, then Azure CLI credentials
 
 Usage:
     python list_indexes.py
@@ -16,26 +16,33 @@ Output:
     Displays a list of all index names in the search service.
 """
 
-import os
-from dotenv import load_dotenv
-from azure.identity import DefaultAzureCredential
+from azure.identity import (
+    AzureCliCredential,
+    ChainedTokenCredential,
+    ManagedIdentityCredential,
+)
 from azure.search.documents.indexes import SearchIndexClient
 
-# Load environment variables from .env file
-load_dotenv()
+from _config import get_config
+from _transport import requests_transport
 
-# Get configuration from environment variables
-search_url = os.getenv("search_url")
+# Get configuration from .env and the environment
+search_url = get_config().search_url
 
-# Use DefaultAzureCredential for managed identity authentication
-credential = DefaultAzureCredential()
+# Only the two credentials this script is actually run with: managed identity
+# in automation and the Azure CLI on developer machines. DefaultAzureCredential
+# would probe its whole chain before getting here.
+credential = ChainedTokenCredential(ManagedIdentityCredential(), AzureCliCredential())
 
 # Create search index client
-index_client = SearchIndexClient(endpoint=search_url, credential=credential)
+index_client = SearchIndexClient(
+    endpoint=search_url, credential=credential, transport=requests_transport()
+)
 
-# List all indexes
+# List all indexes; select=["name"] sends $select=name so the service returns
+# only the names instead of every index schema.
 print(f"Listing indexes in: {search_url}\n")
-indexes = index_client.list_indexes()
+indexes = index_client.list_indexes(select=["name"])
 
 print("Available indexes:")
 for index in indexes:
@@ -1,10 +1,341 @@
 """Interactive console interface for the knowledge base."""
 
-from kb_query_service import execute_kb_query, get_kb_configuration
+import argparse
+import hashlib
+import io
+import queue
+import shelve
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
 
-print("=" * 80)
+from kb_query_service import (
+    execute_kb_query_batch_sync,
+    execute_kb_query_sync,
+    get_kb_configuration,
+    warm_kb_connection_sync,
+    warm_query_path_sync,
+)
+from semantic_cache import semantic_cache_enabled
+
+# Answers are persisted across sessions; bump the schema version whenever the
+# knowledge source params or the shape of cached results change.
+CACHE_SCHEMA_VERSION = 1
+CACHE_PATH = Path.home() / ".kb_cache" / "answers"
+CACHE_TTL_SECONDS = 3600
+KEEPALIVE_INTERVAL_SECONDS = 30
+EXIT_COMMANDS = ("exit", "quit", "q")
+
+SEP_EQ = "=" * 80
+SEP_DASH = "-" * 80
+
+
+def _cache_key(question, knowledge_base_name):
+    normalized = " ".join(question.lower().split())
+    raw = f"{CACHE_SCHEMA_VERSION}:{knowledge_base_name}:{normalized}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _keep_connection_warm(stop_event):
+    """Ping the search service while the REPL is idle so the next query skips TLS setup.
+
+    The first round also loads the semantic cache, overlapping that set-up with
+    the time the user spends typing their first question.
+    """
+    try:
+        warm_query_path_sync()
+    except Exception:
+        pass
+    while not stop_event.wait(KEEPALIVE_INTERVAL_SECONDS):
+        try:
+            warm_kb_connection_sync()
+        except Exception:
+            # Warming is best effort; the next real query reconnects if needed.
+            pass
+
+
+def render_citations(citations):
+    """Format the citations block as one string so it can be written in a single call."""
+    buf = io.StringIO()
+    write = buf.write
+    write(f"\n{SEP_EQ}\nCITATIONS\n{SEP_EQ}\n")
+    if not citations:
+        write("No citations were returned for this answer.\n")
+    for citation in citations:
+        get = citation.get
+        write(f"\n[ref_id:{citation['id']}]\n{SEP_DASH}\n")
+        write(f"Source Type: {get('type', 'unknown')}\n")
+
+        title = get("title") or get("document") or "Unknown"
+        write(f"Title: {title}\n")
+
+        url = get("url")
+        if url:
+            write(f"URL: {url}\n")
+
+        relevance_score = get("relevanceScore")
+        if relevance_score is not None:
+            write(f"Relevance Score: {relevance_score:.4f}\n")
+
+        citation_text = get("citationText")
+        note = get("note")
+        if citation_text:
+            write(f"\nCitation Text:\n{SEP_DASH}\n{citation_text}\n")
+        elif note:
+            write(f"\nNote: {note}\n")
+    write(f"\n{SEP_EQ}\n")
+    return buf.getvalue()
+
+
+def _cached_result(result, lookup_start_ns):
+    # Integer nanoseconds from perf_counter_ns, converted to seconds once here.
+    elapsed = (time.perf_counter_ns() - lookup_start_ns) / 1e9
+    timing = {
+        "total": elapsed,
+        "requestPreparation": 0.0,
+        "kbRetrieval": 0.0,
+        "responseProcessing": elapsed,
+        "cacheHit": True,
+    }
+    return {**result, "timing": timing}
+
+
+def _lookup_cached(answer_cache, key):
+    """Return the unexpired disk-cached result for ``key``, or None."""
+    lookup_start_ns = time.perf_counter_ns()
+    entry = answer_cache.get(key)
+    if entry and time.time() - entry["storedAt"] < CACHE_TTL_SECONDS:
+        return _cached_result(entry["result"], lookup_start_ns)
+    return None
+
+
+def _store_result(answer_cache, key, result):
+    # SDK activity objects are not needed to re-render an answer.
+    stored = {k: v for k, v in result.items() if k not in ("activity", "timing")}
+    answer_cache[key] = {"storedAt": time.time(), "result": stored}
+
+
+def retrieve_cached(answer_cache, question, knowledge_base_name):
+    """Return the result for a question, serving exact repeats from the disk cache.
+
+    Misses fall back to a KB query; the service answers paraphrases from its
+    semantic cache.
+    """
+    key = _cache_key(question, knowledge_base_name)
+    cached = _lookup_cached(answer_cache, key)
+    if cached is not None:
+        return cached
+
+    result = execute_kb_query_sync(question)
+    _store_result(answer_cache, key, result)
+    return result
+
+
+def retrieve_cached_batch(answer_cache, questions, knowledge_base_name):
+    """Like :func:`retrieve_cached` for several questions, querying the misses concurrently.
+
+    Results come back in submission order; a failed query yields its exception.
+    """
+    results = [None] * len(questions)
+    misses = []
+    for position, question in enumerate(questions):
+        key = _cache_key(question, knowledge_base_name)
+        cached = _lookup_cached(answer_cache, key)
+        if cached is not None:
+            results[position] = cached
+        else:
+            misses.append((position, key))
+
+    if misses:
+        fetched = execute_kb_query_batch_sync(
+            [questions[position] for position, _ in misses],
+            return_exceptions=True,
+        )
+        for (position, key), result in zip(misses, fetched):
+            if not isinstance(result, Exception):
+                _store_result(answer_cache, key, result)
+            results[position] = result
+    return results
+
+
+@dataclass(frozen=True)
+class BatchConfig:
+    """How many piped questions to coalesce, and how long to wait for more."""
+
+    max_batch: int = 8
+    max_wait_ms: int = 100
+
+
+def _read_lines(line_queue):
+    for line in sys.stdin:
+        line_queue.put(line)
+    line_queue.put(None)
+
+
+def _next_batch(line_queue, batch_config):
+    """Block for one question, then gather more until the batch is full or the wait expires.
+
+    Returns ``(questions, done)`` where ``done`` is set on end of input or an exit command.
+    """
+    questions = []
+    deadline = None
+    while len(questions) < batch_config.max_batch:
+        if deadline is None:
+            line = line_queue.get()
+            deadline = time.monotonic() + batch_config.max_wait_ms / 1000
+        else:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                line = line_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+        if line is None:
+            return questions, True
+        question = line.strip()
+        if question.lower() in EXIT_COMMANDS:
+            return questions, True
+        if question:
+            questions.append(question)
+    return questions, False
+
+
+def render_answers(answers):
+    """Format the answer section."""
+    body = "".join(f"{answer_text}\n\n" for answer_text in answers)
+    if not body:
+        body = "No answer found.\n"
+    return f"\n{SEP_EQ}\nANSWER\n{SEP_EQ}\n{body}"
+
+
+def render_metrics(timing):
+    """Format the performance metrics block."""
+    total_time = timing.get("total", 0.0)
+    request_time = timing.get("requestPreparation", 0.0)
+    retrieval_time = timing.get("kbRetrieval", 0.0)
+    processing_time = timing.get("responseProcessing", 0.0)
+    pct = lambda value: (value / total_time * 100) if total_time else 0.0
+
+    return (
+        f"\n{SEP_EQ}\nPERFORMANCE METRICS\n{SEP_EQ}\n"
+        f"Total Query Time:           {total_time:.3f} seconds\n"
+        f"  ├─ Request Preparation:   {request_time:.3f} seconds ({pct(request_time):.1f}%)\n"
+        f"  ├─ KB Retrieval*:         {retrieval_time:.3f} seconds ({pct(retrieval_time):.1f}%)\n"
+        f"  └─ Response Processing:   {processing_time:.3f} seconds ({pct(processing_time):.1f}%)\n"
+        "\n  *KB Retrieval includes: query planning, knowledge source\n"
+        "   selection, search execution, and answer synthesis by Azure OpenAI\n"
+        f"{SEP_EQ}\n"
+    )
+
+
+def render_result(query_result, with_citations=True):
+    """Format a whole query result."""
+    parts = []
+    timing = query_result.get("timing", {})
+    if "semanticSimilarity" in timing:
+        parts.append(f"[semantic cache hit, similarity {timing['semanticSimilarity']:.3f}]\n")
+    elif timing.get("cacheHit"):
+        parts.append("[cache hit]\n")
+
+    parts.append(render_answers(query_result.get("answers", [])))
+    if with_citations:
+        parts.append(render_citations(query_result.get("citations", [])))
+    parts.append(render_metrics(timing))
+    return "".join(parts)
+
+
+def show_result(query_result, with_citations=True):
+    """Print a query result with a single write."""
+    sys.stdout.write(render_result(query_result, with_citations))
+    sys.stdout.flush()
+
+
+def run_interactive(answer_cache, knowledge_base_name, with_citations=True):
+    # (cache key, result) of the previous answer, so a resubmitted question is
+    # answered without touching the disk cache or the network
+    last_answer = None
+
+    # Interactive query loop
+    while True:
+        # Get user input
+        user_query = input("\nYour question: ").strip()
+        
+        # Check for exit commands
+        if user_query.lower() in EXIT_COMMANDS:
+            print("\nThank you for using the Knowledge Base Query Interface!")
+            break
+        
+        # Skip empty queries
+        if not user_query:
+            continue
+        
+        try:
+            print("\nSearching knowledge base...")
+            key = _cache_key(user_query, knowledge_base_name)
+            if last_answer is not None and last_answer[0] == key:
+                show_result(
+                    _cached_result(last_answer[1], time.perf_counter_ns()),
+                    with_citations=with_citations,
+                )
+                continue
+
+            query_result = retrieve_cached(answer_cache, user_query, knowledge_base_name)
+            last_answer = (key, query_result)
+            show_result(query_result, with_citations=with_citations)
+            
+        except Exception as e:
+            print(f"\nError: {str(e)}")
+            print("Please try a different question.")
+
+
+def run_batch(answer_cache, knowledge_base_name, batch_config, with_citations=True):
+    """Answer piped questions, submitting up to ``max_batch`` of them at a time."""
+    line_queue = queue.Queue()
+    threading.Thread(target=_read_lines, args=(line_queue,), daemon=True).start()
+
+    done = False
+    while not done:
+        questions, done = _next_batch(line_queue, batch_config)
+        if not questions:
+            continue
+        print(f"\nSearching knowledge base for {len(questions)} question(s)...")
+        results = retrieve_cached_batch(answer_cache, questions, knowledge_base_name)
+        for question, query_result in zip(questions, results):
+            print(f"\nQuestion: {question}")
+            if isinstance(query_result, Exception):
+                print(f"\nError: {str(query_result)}")
+                continue
+            show_result(query_result, with_citations=with_citations)
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument(
+    "--batch",
+    type=_positive_int,
+    metavar="N",
+    help="read questions from stdin and submit up to N at a time concurrently",
+)
+parser.add_argument(
+    "--no-citations",
+    dest="with_citations",
+    action="store_false",
+    help="print only the answer and timing, without the citations block",
+)
+args = parser.parse_args()
+
+print(SEP_EQ)
 print("Knowledge Base Query Interface")
-print("=" * 80)
+print(SEP_EQ)
 config = get_kb_configuration()
 print(f"Connected to: {config['searchEndpoint']}")
 print(f"Knowledge Base: {config['knowledgeBaseName']}")
@@ -12,100 +343,34 @@ print("\nThis knowledge base includes:")
 for idx_name in config["indexes"]:
     print(f"  • {idx_name}")
 print("  • Bing Web Search (real-time web data)")
-print("\nType your questions and press Enter.")
-print("Type 'exit' or 'quit' to end the session.\n")
-print("=" * 80)
-
-# Interactive query loop
-while True:
-    # Get user input
-    user_query = input("\nYour question: ").strip()
-    
-    # Check for exit commands
-    if user_query.lower() in ['exit', 'quit', 'q']:
-        print("\nThank you for using the Knowledge Base Query Interface!")
-        break
-    
-    # Skip empty queries
-    if not user_query:
-        continue
-    
-    try:
-        print("\nSearching knowledge base...")
-        query_result = execute_kb_query(user_query)
-        
-        # Display response
-        print("\n" + "=" * 80)
-        print("ANSWER")
-        print("=" * 80)
-        answers = query_result.get("answers", [])
-        if answers:
-            for answer_text in answers:
-                print(answer_text)
-                print()
-        else:
-            print("No answer found.")
-        
-        # Display references/citations if available
-        citations = query_result.get("citations", [])
-        if citations:
-            print("\n" + "=" * 80)
-            print("CITATIONS")
-            print("=" * 80)
-            for citation in citations:
-                print(f"\n[ref_id:{citation['id']}]")
-                print("-" * 80)
-                
-                source_type = citation.get("type", "unknown")
-                print(f"Source Type: {source_type}")
-
-                title = citation.get("title") or citation.get("document") or "Unknown"
-                if title:
-                    print(f"Title: {title}")
-
-                if citation.get("url"):
-                    print(f"URL: {citation['url']}")
-
-                if citation.get("relevanceScore") is not None:
-                    print(f"Relevance Score: {citation['relevanceScore']:.4f}")
-
-                citation_text = citation.get("citationText")
-                if citation_text:
-                    print(f"\nCitation Text:")
-                    print("-" * 80)
-                    print(citation_text)
-                elif citation.get("note"):
-                    print(f"\nNote: {citation['note']}")
-            
-            print("\n" + "=" * 80)
-        else:
-            print("\n" + "=" * 80)
-            print("CITATIONS")
-            print("=" * 80)
-            print("No citations were returned for this answer.")
-            print("\n" + "=" * 80)
-        
-        # Display timing information
-        timing = query_result.get("timing", {})
-        print("\n" + "=" * 80)
-        print("PERFORMANCE METRICS")
-        print("=" * 80)
-        total_time = timing.get("total", 0.0)
-        request_time = timing.get("requestPreparation", 0.0)
-        retrieval_time = timing.get("kbRetrieval", 0.0)
-        processing_time = timing.get("responseProcessing", 0.0)
-        pct = lambda value: (value / total_time * 100) if total_time else 0.0
-
-        print(f"Total Query Time:           {total_time:.3f} seconds")
-        print(f"  ├─ Request Preparation:   {request_time:.3f} seconds ({pct(request_time):.1f}%)")
-        print(f"  ├─ KB Retrieval*:         {retrieval_time:.3f} seconds ({pct(retrieval_time):.1f}%)")
-        print(f"  └─ Response Processing:   {processing_time:.3f} seconds ({pct(processing_time):.1f}%)")
-        print(f"\n  *KB Retrieval includes: query planning, knowledge source")
-        print(f"   selection, search execution, and answer synthesis by Azure OpenAI")
-        print("=" * 80)
-        
-    except Exception as e:
-        print(f"\nError: {str(e)}")
-        print("Please try a different question.")
+if not args.batch:
+    print("\nType your questions and press Enter.")
+    print("Type 'exit' or 'quit' to end the session.\n")
+print(SEP_EQ)
+
+CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+answer_cache = shelve.open(str(CACHE_PATH))
+if semantic_cache_enabled():
+    print("Semantic cache enabled for paraphrased questions.")
+
+if args.batch:
+    run_batch(
+        answer_cache,
+        config["knowledgeBaseName"],
+        BatchConfig(max_batch=args.batch),
+        with_citations=args.with_citations,
+    )
+else:
+    stop_keepalive = threading.Event()
+    threading.Thread(
+        target=_keep_connection_warm, args=(stop_keepalive,), daemon=True
+    ).start()
+    run_interactive(
+        answer_cache,
+        config["knowledgeBaseName"],
+        with_citations=args.with_citations,
+    )
+    stop_keepalive.set()
 
+answer_cache.close()
 print()
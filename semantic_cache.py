@@ -0,0 +1,252 @@
+"""Embedding-based cache for paraphrased knowledge base questions.
+
+Exact-match caches miss paraphrases such as "What policies does Contoso
+Insurance sell?" versus "insurance policies Contoso offers?". This module embeds
+each question once with an Azure OpenAI embedding deployment and keeps the
+normalized vectors in a NumPy matrix, so a lookup is a single matrix-vector
+product followed by ``argmax``.
+"""
+
+from __future__ import annotations
+
+import base64
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from openai import AzureOpenAI
+
+load_dotenv()
+
+DEFAULT_THRESHOLD = 0.92
+DEFAULT_MAX_ENTRIES = 5000
+
+# One JSON record per line holding the timestamp, vector and answer together,
+# so a torn write can never pair a vector with the wrong answer.
+_LOG_FILE = "entries.jsonl"
+_MIN_CAPACITY = 16
+
+
+def semantic_cache_enabled() -> bool:
+    """The semantic cache is opt-in because every lookup costs one embedding call."""
+
+    return (
+        os.getenv("KB_SEMANTIC_CACHE", "0") == "1"
+        and bool(os.getenv("az-openai_endpoint"))
+        and bool(os.getenv("az-openai-key"))
+    )
+
+
+class QueryEmbedder:
+    """Embeds questions with Azure OpenAI, memoizing by exact text.
+
+    The underlying OpenAI client holds one keep-alive HTTP connection pool for
+    the lifetime of the embedder.
+    """
+
+    def __init__(self) -> None:
+        self._client = AzureOpenAI(
+            azure_endpoint=os.getenv("az-openai_endpoint"),
+            api_key=os.getenv("az-openai-key"),
+            api_version=os.getenv("az-openai-api-version", "2024-06-01"),
+        )
+        self._deployment = os.getenv(
+            "az-openai-embedding-deployment", "text-embedding-3-small"
+        )
+        self.embed = lru_cache(maxsize=1024)(self._embed)
+
+    def _embed(self, text: str) -> np.ndarray:
+        response = self._client.embeddings.create(model=self._deployment, input=text)
+        vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+        return vector / np.linalg.norm(vector)
+
+
+class SemanticCache:
+    """In-memory cosine-similarity index of previously answered questions.
+
+    With ``ttl`` set, entries older than ``ttl`` seconds are evicted on lookup.
+    Entries are appended in time order, so the expired ones are always a prefix.
+    Vectors live in a preallocated matrix, so adding one copies a single row.
+
+    A cache loaded from a directory persists to an append-only log there; see
+    :meth:`append_to_disk`.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: Optional[float] = None,
+        directory: Optional[Path] = None,
+    ) -> None:
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = directory
+        # Live rows are _buffer[_start:_start + len(self)].
+        self._buffer: Optional[np.ndarray] = None
+        self._start = 0
+        self._values: List[Dict[str, Any]] = []
+        self._stored_at: List[float] = []
+        self._io_lock = threading.Lock()
+        self._log_lines = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def lookup(self, vector: np.ndarray) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Return the closest cached value and its similarity, if above threshold."""
+
+        self._evict_expired()
+        if self._buffer is None or not self._values:
+            return None
+        vectors = self._buffer[self._start : self._start + len(self._values)]
+        similarities = vectors @ vector
+        best = int(np.argmax(similarities))
+        score = float(similarities[best])
+        if score < self.threshold:
+            return None
+        return self._values[best], score
+
+    def add(self, vector: np.ndarray, value: Dict[str, Any]) -> float:
+        """Add an entry in memory and return its timestamp."""
+
+        stored_at = time.time()
+        self._append(vector, value, stored_at)
+        if len(self._values) > self.max_entries:
+            # Oldest entries are evicted first.
+            self._drop_oldest(len(self._values) - self.max_entries)
+        return stored_at
+
+    def append_to_disk(
+        self, vector: np.ndarray, value: Dict[str, Any], stored_at: float
+    ) -> None:
+        """Append one entry to the on-disk log.
+
+        Only touches the log file, not the in-memory index, so it can run in a
+        worker thread. Once the log holds twice ``max_entries`` records it is
+        compacted by atomically replacing it with the live entries.
+        """
+
+        if self.directory is None:
+            return
+        line = _encode_record(vector, value, stored_at)
+        with self._io_lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.directory / _LOG_FILE, "ab") as handle:
+                handle.write(line)
+            self._log_lines += 1
+            if self._log_lines > 2 * self.max_entries:
+                records, _ = _read_log(self.directory / _LOG_FILE)
+                self._log_lines = self._rewrite_log(records)
+
+    def _append(self, vector: np.ndarray, value: Dict[str, Any], stored_at: float) -> None:
+        row = vector.astype(np.float32, copy=False).reshape(-1)
+        count = len(self._values)
+        end = self._start + count
+        if self._buffer is None:
+            self._buffer = np.empty((_MIN_CAPACITY, row.shape[0]), dtype=np.float32)
+            self._start = end = 0
+        elif end == self._buffer.shape[0]:
+            # Out of room at the tail: move the live rows to the front of a
+            # buffer with at least as much headroom again (amortized O(1)).
+            capacity = max(_MIN_CAPACITY, 2 * (count + 1))
+            buffer = np.empty((capacity, row.shape[0]), dtype=np.float32)
+            buffer[:count] = self._buffer[self._start : end]
+            self._buffer, self._start, end = buffer, 0, count
+        self._buffer[end] = row
+        self._values.append(value)
+        self._stored_at.append(stored_at)
+
+    def _evict_expired(self) -> None:
+        if self.ttl is None or not self._stored_at:
+            return
+        expired = bisect.bisect_left(self._stored_at, time.time() - self.ttl)
+        if expired:
+            self._drop_oldest(expired)
+
+    def _drop_oldest(self, count: int) -> None:
+        if count >= len(self._values):
+            self._buffer, self._start = None, 0
+        else:
+            self._start += count
+        self._values = self._values[count:]
+        self._stored_at = self._stored_at[count:]
+
+    def _live_records(
+        self, records: List[Tuple[float, np.ndarray, Dict[str, Any]]]
+    ) -> List[Tuple[float, np.ndarray, Dict[str, Any]]]:
+        if self.ttl is not None:
+            cutoff = time.time() - self.ttl
+            records = [record for record in records if record[0] >= cutoff]
+        return records[-self.max_entries :] if self.max_entries > 0 else []
+
+    def _rewrite_log(self, records: List[Tuple[float, np.ndarray, Dict[str, Any]]]) -> int:
+        """Atomically replace the log with its live records; return how many remain."""
+
+        live = self._live_records(records)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                for stored_at, vector, value in live:
+                    handle.write(_encode_record(vector, value, stored_at))
+            os.replace(temp_path, self.directory / _LOG_FILE)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return len(live)
+
+    @classmethod
+    def load(cls, directory: Path, **kwargs: Any) -> "SemanticCache":
+        cache = cls(directory=directory, **kwargs)
+        records, clean = _read_log(directory / _LOG_FILE)
+        live = cache._live_records(records)
+        for stored_at, vector, value in live:
+            cache._append(vector, value, stored_at)
+        cache._log_lines = len(records)
+        if not clean or len(live) < len(records):
+            # Drop torn, expired and surplus records so later appends start on
+            # a clean line.
+            with cache._io_lock:
+                cache._log_lines = cache._rewrite_log(records)
+        return cache
+
+
+def _encode_record(vector: np.ndarray, value: Dict[str, Any], stored_at: float) -> bytes:
+    row = vector.astype(np.float32, copy=False).reshape(-1)
+    record = {
+        "storedAt": stored_at,
+        "vector": base64.b64encode(row.tobytes()).decode("ascii"),
+        "value": value,
+    }
+    return (json.dumps(record) + "\n").encode("utf-8")
+
+
+def _read_log(path: Path) -> Tuple[List[Tuple[float, np.ndarray, Dict[str, Any]]], bool]:
+    """Return the log's valid records in order and whether every line was valid."""
+
+    records: List[Tuple[float, np.ndarray, Dict[str, Any]]] = []
+    if not path.exists():
+        return records, True
+    clean = True
+    with open(path, "rb") as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+                vector = np.frombuffer(base64.b64decode(record["vector"]), dtype=np.float32)
+                records.append((float(record["storedAt"]), vector, record["value"]))
+            except (ValueError, KeyError, TypeError):
+                # A torn final write, or a record glued onto one.
+                clean = False
+            else:
+                if not line.endswith(b"\n"):
+                    clean = False
+    return records, clean
@@ -93,6 +93,7 @@ const OUTPUT_MODE_LABELS = {
 const QUERY_MODE_LABELS = {
     "per-source": "Per-source parameters (with references)",
     "kb-level": "KB-level override (reasoning effort only)",
+    "fan-out": "Fan-out (parallel per-index queries)",
 };
 
 const formatOverrideValue = (value, labels) => {
@@ -184,7 +185,7 @@ const renderConversation = () => {
         const metrics = document.createElement("div");
         metrics.className = "metrics-grid";
         [
-            { label: "Total", value: interaction.timing.total },
+            { label: interaction.timing.cacheHit ? "Total (cached)" : "Total", value: interaction.timing.total },
             { label: "Request Prep", value: interaction.timing.requestPreparation },
             { label: "KB Retrieval", value: interaction.timing.kbRetrieval },
             { label: "Response Processing", value: interaction.timing.responseProcessing },
@@ -1,23 +1,135 @@
 """FastAPI web application for interactive knowledge base queries."""
 
+import asyncio
+import hashlib
+import logging
+import os
+from contextlib import asynccontextmanager, suppress
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Dict, Optional
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
 from pydantic import BaseModel, ConfigDict, Field
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
 
-from kb_query_service import KBConfigurationError, execute_kb_query, get_kb_configuration
+from kb_query_service import (
+    KBConfigurationError,
+    close_kb_client,
+    execute_kb_query_event_stream,
+    execute_kb_query_json,
+    get_kb_client,
+    get_kb_configuration,
+    register_configuration_reset_hook,
+    warm_cache,
+    warm_cache_enabled,
+    warm_kb_connection,
+)
 
 BASE_DIR = Path(__file__).resolve().parent
 STATIC_DIR = BASE_DIR / "static"
 TEMPLATES_DIR = BASE_DIR / "templates"
+INDEX_TEMPLATE = "index.html"
 
-app = FastAPI(title="Contoso Knowledge Base", version="1.0.0")
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+logger = logging.getLogger(__name__)
+
+
+def _log_warm_cache_failure(task: "asyncio.Task[int]") -> None:
+    # Report as soon as warming fails (e.g. a missing or malformed
+    # warm_queries.json); shutdown would otherwise discard the exception.
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Cache warm-up failed", exc_info=task.exception())
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    # Build the shared client on the server's loop and open a pooled
+    # connection, so the first user query does not pay for TCP and TLS setup.
+    # Compile templates up front so the first page view does not pay for it.
+    for name in templates.env.list_templates():
+        templates.env.get_template(name)
+    try:
+        await get_kb_client()
+        await warm_kb_connection()
+    except Exception as exc:  # pragma: no cover - startup warm-up is best effort
+        logger.warning("Could not warm the knowledge base connection: %s", exc)
+    # Pre-answer common questions in the background; the server starts serving
+    # immediately and identical live questions join the in-flight queries.
+    warm_task = None
+    if warm_cache_enabled():
+        warm_task = asyncio.create_task(warm_cache())
+        warm_task.add_done_callback(_log_warm_cache_failure)
+    yield
+    if warm_task is not None:
+        warm_task.cancel()
+        with suppress(asyncio.CancelledError, Exception):
+            await warm_task
+    await close_kb_client()
+
+
+class HashedStaticFiles(StaticFiles):
+    """Static files with content-hash ETags and long-lived caching for versioned URLs.
+
+    Each file is hashed once at startup. Requests whose ``?v=`` matches the
+    current hash (as produced by :meth:`url_for`) are marked immutable; other
+    requests revalidate against the ETag.
+    """
+
+    IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+    def __init__(self, *, directory: Path, **kwargs) -> None:
+        super().__init__(directory=directory, **kwargs)
+        self.hashes: Dict[str, str] = {}
+        self._hashes_by_path: Dict[str, str] = {}
+        for path in Path(directory).rglob("*"):
+            if path.is_file():
+                digest = hashlib.blake2b(path.read_bytes(), digest_size=8).hexdigest()
+                self.hashes[path.relative_to(directory).as_posix()] = digest
+                self._hashes_by_path[os.path.realpath(path)] = digest
+
+    def url_for(self, path: str) -> str:
+        """Return the cache-busting URL for ``path`` under the /static mount."""
+
+        return f"/static/{path}?v={self.hashes[path]}"
+
+    def file_response(
+        self,
+        full_path: os.PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        digest = self._hashes_by_path.get(os.path.realpath(full_path))
+        if digest is None:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        response.headers["etag"] = f'"{digest}"'
+        if QueryParams(scope["query_string"]).get("v") == digest:
+            response.headers["cache-control"] = self.IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["cache-control"] = "no-cache"
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+app = FastAPI(title="Contoso Knowledge Base", version="1.0.0", lifespan=lifespan)
+static_files = HashedStaticFiles(directory=STATIC_DIR)
+app.mount("/static", static_files, name="static")
 templates = Jinja2Templates(directory=TEMPLATES_DIR)
+# Templates only change on deploy (uvicorn --reload restarts the process), so
+# skip the per-render mtime check and reuse compiled bytecode across restarts.
+templates.env.auto_reload = False
+templates.env.bytecode_cache = FileSystemBytecodeCache()
+templates.env.globals["static_url"] = static_files.url_for
 
 
 class QueryPayload(BaseModel):
@@ -35,34 +147,71 @@ class QueryPayload(BaseModel):
     query_mode: str = Field(
         default="per-source",
         alias="queryMode",
-        description="Query mode: 'per-source' (specify params per source) or 'kb-level' (override KB defaults)",
+        description=(
+            "Query mode: 'per-source' (specify params per source), 'kb-level' "
+            "(override KB defaults) or 'fan-out' (query each index in parallel)"
+        ),
     )
 
-    model_config = ConfigDict(populate_by_name=True)
+    # Strip surrounding whitespace during validation, so a blank question fails
+    # the min_length check before reaching the service.
+    model_config = ConfigDict(populate_by_name=True, str_strip_whitespace=True)
+
+
+@lru_cache(maxsize=1)
+def _render_index() -> str:
+    # The page depends only on the KB configuration and the asset hashes, both
+    # fixed for the life of the process, so it is rendered once (and again
+    # after a configuration reset).
+    return templates.get_template(INDEX_TEMPLATE).render(config=get_kb_configuration())
+
+
+register_configuration_reset_hook(_render_index.cache_clear)
 
 
 @app.get("/", response_class=HTMLResponse)
-async def index(request: Request) -> HTMLResponse:
-    config = get_kb_configuration()
-    return templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "config": config,
-        },
-    )
+async def index() -> HTMLResponse:
+    return HTMLResponse(_render_index())
 
 
 @app.post("/api/query")
-async def query_kb(payload: QueryPayload):
+async def query_kb(payload: QueryPayload) -> Response:
     try:
-        result = execute_kb_query(
+        body = await execute_kb_query_json(
             payload.question,
             retrieval_reasoning_effort=payload.retrieval_reasoning_effort,
             output_mode=payload.output_mode,
             query_mode=payload.query_mode,
         )
-        return result
+        return Response(content=body, media_type="application/json")
+    except KBConfigurationError as exc:  # pragma: no cover - configuration guard
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:  # pragma: no cover - generic fallback
+        raise HTTPException(status_code=500, detail="Unable to process the query.") from exc
+
+
+@app.post("/api/query/stream")
+async def query_kb_stream(payload: QueryPayload) -> StreamingResponse:
+    """Return the /api/query result as server-sent events.
+
+    This is a compatibility shim for clients that consume event streams. The
+    retrieve API does not stream tokens yet, so every event is sent only after
+    the full answer is ready and time-to-first-byte matches /api/query. The
+    bundled UI therefore uses /api/query.
+    """
+
+    events = execute_kb_query_event_stream(
+        payload.question,
+        retrieval_reasoning_effort=payload.retrieval_reasoning_effort,
+        output_mode=payload.output_mode,
+        query_mode=payload.query_mode,
+    )
+    # Wait for the first event before committing to a 200, so validation and
+    # upstream errors still map to the same status codes as /api/query.
+    try:
+        first_event = await events.__anext__()
     except KBConfigurationError as exc:  # pragma: no cover - configuration guard
         raise HTTPException(status_code=500, detail=str(exc)) from exc
     except ValueError as exc:
@@ -70,6 +219,17 @@ async def query_kb(payload: QueryPayload):
     except Exception as exc:  # pragma: no cover - generic fallback
         raise HTTPException(status_code=500, detail="Unable to process the query.") from exc
 
+    async def body() -> AsyncIterator[bytes]:
+        yield first_event
+        async for event in events:
+            yield event
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
 
 @app.get("/health")
 async def health_check():